@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Geographic Placement Core - floor parsing and placement scoring shared by
+the CLI and web versions
+
+Both geo_placer.py and geo_placer_web.py import from here, so the regexes
+compile once, the normalize_floor cache is shared, and both frontends
+score teams with the same pick_team kernel.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+# =============================================================================
+# FLOOR PARSING
+# =============================================================================
+
+# ED / emergency keywords → no floor (any team)
+_ED_TOKENS = ('ED', 'EMERGENCY', 'ER ')
+
+# Boyer bed prefixes: recovery zone (RZ15) and Y-wing
+_BOYER_PREFIXES = ('RZ', 'Y')
+
+# Location pattern, compiled once at import. One match() call: the first
+# branch scans the whole string for floor + direction ("5E", "3 East",
+# "Floor 5 East", "5E-512") before the second falls back to a room ("512").
+_FLOOR_RE = re.compile(
+    r'.*?(?P<floor>\d+)\s*(?P<dir>[EW]|EAST|WEST)'
+    r'|.*?\b(?P<room_floor>\d)(?P<room>\d{2})\b',
+    re.DOTALL,
+)
+
+def normalize_floor(location: str) -> Optional[str]:
+    """
+    Parse a location string and extract the floor.
+
+    Room numbering convention:
+        X01-X20 = Floor X West
+        X30-X50 = Floor X East
+        750+, 850+, 9W, RZ*, Y* = Boyer wing → Med 12
+        Suffix A/B ignored (312A = 312B = same room)
+
+    Examples:
+        "312A" → "3W" (room 12 on floor 3 = West)
+        "545B" → "5E" (room 45 on floor 5 = East)
+        "877" → "BOYER" (Boyer wing)
+        "IMCU" → "IMCU" (Med 1, 2, 3)
+        "ED" → None (can go anywhere)
+    """
+    return _normalize_floor(location.strip().upper())
+
+
+@lru_cache(maxsize=4096)
+def _normalize_floor(original: str) -> Optional[str]:
+    """Parse a stripped, uppercased location. Memoized: the same rooms recur."""
+    # Fast path: bare room number ("512") is the common case - no regex needed
+    if len(original) == 3 and original.isdecimal():
+        return _room_floor(original[0], int(original[1:]))
+
+    # Special locations - check BEFORE modifying the string
+    # IMCU is on 3E, maps to Med 1, 2, 3
+    if 'IMCU' in original:
+        return 'IMCU'
+
+    # Overnight recovery → Med 12 (Boyer)
+    if 'OVERNIGHT' in original or 'ONR' in original or 'RECOVERY' in original:
+        return 'BOYER'
+
+    # Recovery zone (RZ15) and Y-wing beds are Boyer
+    if original.startswith(_BOYER_PREFIXES):
+        return 'BOYER'
+
+    # ED patients - can go to any team (lowest census)
+    if any(x in original for x in _ED_TOKENS):
+        return None  # Will be assigned to lowest census team
+
+    # Boyer explicitly mentioned
+    if 'BOYER' in original:
+        return 'BOYER'
+
+    # Main hospital without a room - any team
+    if original == 'MAIN':
+        return None
+
+    # Now safe to remove bed suffix (A, B, etc.) for room number parsing
+    location = original[:-1] if 'A' <= original[-1:] <= 'Z' else original
+
+    match = _FLOOR_RE.match(location)
+    if match is None:
+        return None
+
+    # Pattern: explicit floor + direction (e.g., "5E", "7W", "3 East", "5E-512")
+    floor_num = match['floor']
+    if floor_num is not None:
+        direction = match['dir'][0]  # First letter: E or W
+        # 9W is Boyer
+        if floor_num == '9' and direction == 'W':
+            return 'BOYER'
+        return f"{floor_num}{direction}"
+
+    # Pattern: room number (e.g., "312", "545", "877")
+    return _room_floor(match['room_floor'], int(match['room']))
+
+
+def _room_floor(floor_num: str, room_num: int) -> str:
+    """Map a room (floor digit + two-digit room) to its floor code."""
+    # Boyer wing: 750+ on floor 7, 850+ on floor 8
+    if floor_num == '7' and room_num >= 50:
+        return 'BOYER'
+    if floor_num == '8' and room_num >= 50:
+        return 'BOYER'
+    # 9xx rooms are Boyer
+    if floor_num == '9':
+        return 'BOYER'
+
+    # Standard rooms
+    if 1 <= room_num <= 20:
+        return f"{floor_num}W"
+    elif 30 <= room_num < 50:
+        return f"{floor_num}E"
+    else:
+        # Room number outside normal range
+        return f"{floor_num}?"
+
+
+def add_ambiguous_floors(floor_to_teams: dict[str, list[int]]) -> None:
+    """
+    Add "N?" entries (room number outside 01-20, 30-50) to a floor → teams table.
+
+    Each is a list like the rest of the table: the union of that floor's East
+    and West teams, East first, so get_geographic_teams is a single dict lookup.
+    """
+    floor_to_teams.update({
+        f"{n}?": list(dict.fromkeys([*floor_to_teams.get(f"{n}E", ()), *floor_to_teams.get(f"{n}W", ())]))
+        for n in sorted({f[:-1] for f in floor_to_teams if f[-1] in 'EW'})
+    })
+
+
+# =============================================================================
+# PLACEMENT SCORING
+# =============================================================================
+
+# IMCU teams (Med 1-3) - lower cap due to higher acuity
+IMCU_TEAMS = frozenset({1, 2, 3})
+IMCU_MASK = sum(1 << t for t in IMCU_TEAMS)  # Bit t set = Med t is an IMCU team
+IMCU_CAP = 10  # Hard cap for IMCU teams
+# Floors whose patients NEED Med 1-3 (may take the 10th IMCU slot)
+IMCU_FLOORS = frozenset({'3W', 'IMCU'})
+# Floors exempt from the IMCU non-geo bonus
+IMCU_HOME_FLOORS = frozenset({'3W', '3E', 'IMCU'})
+
+# Scoring weights (lower score = better)
+# score = (census * CENSUS_WEIGHT) + (redis * REDIS_WEIGHT) + penalty
+# penalty = 0 if geographic, GEO_PENALTY if not (or IMCU_PENALTY for 3W/IMCU patients)
+CENSUS_WEIGHT = 1.0    # Weight for current census
+REDIS_WEIGHT = 1.0     # Weight for new patients (redis) tonight
+GEO_PENALTY = 3.0      # Penalty for non-geographic placement
+IMCU_PENALTY = 10.0    # Higher penalty for 3W/IMCU patients going off-floor (they NEED Med 1-3)
+IMCU_NON_GEO_BONUS = 4.0  # Extra score for non-3W/3E patients going to IMCU teams
+
+
+def pick_team(
+    floor: Optional[str],
+    geo_mask: int,
+    census: list[int],
+    new_assignments: list[int],
+    open_teams: list[int],
+    regular_open_teams: list[int],
+    regular_under_cap: list[int],
+    overflow_under_cap: list[int],
+    imcu_open: list[int],
+    any_idle: bool,
+) -> Optional[tuple[int, float]]:
+    """
+    Pick the best team for one patient. Returns (team, score), or None if no team is eligible.
+
+    Flat loops over the dense census arrays - no per-patient closures or
+    key-function calls. Ties on score go to lower census, then geographic.
+    The team lists are the caller's partitions of its open teams, so each
+    frontend keeps its own overflow policy and soft-cap bookkeeping.
+    any_idle: some open regular team has no new patients yet.
+    """
+    # Determine penalty for this patient
+    is_imcu_patient = floor in IMCU_FLOORS
+    non_geo_penalty = IMCU_PENALTY if is_imcu_patient else GEO_PENALTY
+    # IMCU teams are capped at 10; treat non-3W/3E patients as +4 census
+    imcu_bonus = 0.0 if floor in IMCU_HOME_FLOORS else IMCU_NON_GEO_BONUS
+
+    # Hard constraints only bite on IMCU teams: hard cap at 10, and the
+    # 10th slot is reserved for IMCU patients only (3W, IMCU, or * suffix)
+    imcu_limit = IMCU_CAP if is_imcu_patient else IMCU_CAP - 1
+    blocked = 0  # Bit t set = Med t is full for this patient
+    for t in imcu_open:
+        if census[t] >= imcu_limit:
+            blocked |= 1 << t
+
+    # Get eligible teams, preferring regular teams over overflow
+    # First try: regular teams under soft cap
+    candidates = [t for t in regular_under_cap if not blocked >> t & 1]
+
+    # If no regular teams under soft cap, try overflow teams
+    if not candidates:
+        candidates = [t for t in overflow_under_cap if not blocked >> t & 1]
+
+    # If still none, allow regular teams over soft cap
+    if not candidates:
+        candidates = [t for t in regular_open_teams if not blocked >> t & 1]
+
+    # Last resort: any open team that's eligible
+    if not candidates:
+        candidates = [t for t in open_teams if not blocked >> t & 1]
+
+    best = None
+    best_key = None
+    for t in candidates:
+        c = census[t]
+        r = new_assignments[t]
+        is_geo = geo_mask >> t & 1
+
+        # Score = census + redis + penalty
+        score = (c * CENSUS_WEIGHT) + (r * REDIS_WEIGHT)
+        if not is_geo:
+            score += non_geo_penalty
+        if IMCU_MASK >> t & 1:
+            score += imcu_bonus
+
+        # Penalty for piling on: if this team has 2+ redis and others have 0
+        if r >= 2 and any_idle:
+            score += 2.0  # Discourage giving 3rd+ patient when others have none
+
+        # Compare as (score, current_census, not_geo); first minimum wins
+        key = (score, c, 0 if is_geo else 1)
+        if best_key is None or key < best_key:
+            best, best_key = t, key
+
+    if best is None:
+        return None
+    return best, best_key[0]
@@ -11,10 +11,22 @@ Use cases:
 - Morning T-list distribution of overnight admissions
 """
 
-import re
 from dataclasses import dataclass
-from typing import Optional
-from collections import defaultdict
+from operator import attrgetter
+
+from geo_core import (
+    CENSUS_WEIGHT,
+    GEO_PENALTY,
+    IMCU_CAP,
+    IMCU_FLOORS,
+    IMCU_MASK,
+    IMCU_PENALTY,
+    IMCU_TEAMS,
+    REDIS_WEIGHT,
+    add_ambiguous_floors,
+    normalize_floor,
+    pick_team,
+)
 
 # =============================================================================
 # GEOGRAPHIC MAPPINGS
@@ -40,6 +52,10 @@ FLOOR_TO_TEAMS = {
     'BOYER': [12, 6],   # Boyer: preferentially Med 12, overflow to Med 6, then anywhere
 }
 
+# Ambiguous floor (e.g., "5?" when room number was outside 01-20, 30-50):
+# union of that floor's East and West teams, precomputed once at import
+add_ambiguous_floors(FLOOR_TO_TEAMS)
+
 # Team → Floors (for display)
 TEAM_FLOORS = {
     1: ['3W', '3E', 'IMCU'],
@@ -60,149 +76,54 @@ TEAM_FLOORS = {
 }
 
 # All valid teams
-ALL_TEAMS = list(range(1, 16))  # Med 1-15
-OVERFLOW_TEAMS = [14, 15]  # Only used when regular teams are full
+ALL_TEAMS = tuple(range(1, 16))  # Med 1-15
+OVERFLOW_TEAMS = frozenset({14, 15})  # Only used when regular teams are full
 
-# IMCU teams (Med 1-3) - lower cap due to higher acuity
-IMCU_TEAMS = [1, 2, 3]
-IMCU_CAP = 10  # Hard cap for IMCU teams
+# Display strings, built once instead of on every print
+_TEAM_LABELS = {t: f"Med {t}" for t in ALL_TEAMS}
+_TEAM_FLOOR_STRS = {t: ', '.join(TEAM_FLOORS[t]) for t in ALL_TEAMS}
+_BARS = tuple("█" * i for i in range(21))  # Census bars, capped at 20
 
 # Soft cap for regular teams - try not to exceed
 SOFT_CAP = 14  # Avoid loading teams above this
 
-# Scoring weights (lower score = better)
-# score = (census * CENSUS_WEIGHT) + (redis * REDIS_WEIGHT) + penalty
-# penalty = 0 if geographic, GEO_PENALTY if not (or IMCU_PENALTY for 3W/IMCU patients)
-CENSUS_WEIGHT = 1.0    # Weight for current census
-REDIS_WEIGHT = 1.0     # Weight for new patients (redis) tonight
-GEO_PENALTY = 3.0      # Penalty for non-geographic placement
-IMCU_PENALTY = 10.0    # Higher penalty for 3W/IMCU patients going off-floor (they NEED Med 1-3)
-IMCU_NON_GEO_BONUS = 4.0  # Extra score for non-3W/3E patients going to IMCU teams
-
 # =============================================================================
 # DATA STRUCTURES
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Patient:
     identifier: str  # Room/bed number or name
     floor: str       # Normalized floor (e.g., "5E")
     raw_location: str  # Original input
 
 
-@dataclass
+@dataclass(slots=True)
 class Assignment:
     patient: Patient
     team: int
     is_geographic: bool
-    reason: str
+    score: float
+
+    @property
+    def reason(self) -> str:
+        """Why this team was picked. Formatted on access, not in the placement loop."""
+        if self.is_geographic:
+            return f"Geographic ({self.patient.floor} → Med {self.team}, score={self.score:.1f})"
+        if self.patient.floor:
+            return f"Balance ({self.patient.floor} → Med {self.team}, score={self.score:.1f})"
+        return f"No floor specified (Med {self.team}, score={self.score:.1f})"
 
 
 # =============================================================================
 # FLOOR PARSING
 # =============================================================================
 
-def normalize_floor(location: str) -> Optional[str]:
-    """
-    Parse a location string and extract the floor.
-
-    Room numbering convention:
-        X01-X20 = Floor X West
-        X30-X50 = Floor X East
-        750+, 850+, 9W = Boyer wing → Med 12
-        Suffix A/B ignored (312A = 312B = same room)
-
-    Examples:
-        "312A" → "3W" (room 12 on floor 3 = West)
-        "545B" → "5E" (room 45 on floor 5 = East)
-        "877" → "BOYER" (Boyer wing)
-        "IMCU" → "IMCU" (Med 1, 2, 3)
-        "ED" → None (can go anywhere)
-    """
-    original = location.strip().upper()
-
-    # Special locations - check BEFORE modifying the string
-    # IMCU is on 3E, maps to Med 1, 2, 3
-    if 'IMCU' in original:
-        return 'IMCU'
-
-    # Overnight recovery → Med 12 (Boyer)
-    if 'OVERNIGHT' in original or 'ONR' in original or 'RECOVERY' in original:
-        return 'BOYER'
-
-    # ED patients - can go to any team (lowest census)
-    if any(x in original for x in ['ED', 'EMERGENCY', 'ER ']):
-        return None  # Will be assigned to lowest census team
-
-    # Boyer explicitly mentioned
-    if 'BOYER' in original:
-        return 'BOYER'
-
-    # Now safe to remove bed suffix (A, B, etc.) for room number parsing
-    location = re.sub(r'[A-Z]$', '', original)
-
-    # Pattern: explicit floor + direction (e.g., "5E", "7W", "3 East", "5E-512")
-    match = re.search(r'(\d+)\s*([EW]|EAST|WEST)', location)
-    if match:
-        floor_num = match.group(1)
-        direction = match.group(2)[0]  # First letter: E or W
-        # 9W is Boyer
-        if floor_num == '9' and direction == 'W':
-            return 'BOYER'
-        return f"{floor_num}{direction}"
-
-    # Pattern: room number (e.g., "312", "545", "877")
-    match = re.search(r'\b(\d)(\d{2})\b', location)
-    if match:
-        floor_num = match.group(1)
-        room_num = int(match.group(2))
-
-        # Boyer wing: 750+ on floor 7, 850+ on floor 8
-        if floor_num == '7' and room_num >= 50:
-            return 'BOYER'
-        if floor_num == '8' and room_num >= 50:
-            return 'BOYER'
-        # 9xx rooms are Boyer
-        if floor_num == '9':
-            return 'BOYER'
-
-        # Standard rooms
-        if 1 <= room_num <= 20:
-            return f"{floor_num}W"
-        elif 30 <= room_num < 50:
-            return f"{floor_num}E"
-        else:
-            # Room number outside normal range
-            return f"{floor_num}?"
-
-    # Pattern: "Floor 5 East" or similar
-    match = re.search(r'FLOOR\s*(\d+)\s*(EAST|WEST|E|W)', location)
-    if match:
-        floor_num = match.group(1)
-        direction = match.group(2)[0]
-        return f"{floor_num}{direction}"
-
-    return None
-
+# normalize_floor is shared with the web version - see geo_core.py
 
 def get_geographic_teams(floor: str) -> list[int]:
-    """Get teams that cover a given floor."""
-    if not floor:
-        return []
-
-    if floor in FLOOR_TO_TEAMS:
-        return FLOOR_TO_TEAMS[floor]
-
-    # Handle ambiguous floor (e.g., "5?" when room number was outside 01-20, 30-50)
-    if floor.endswith('?'):
-        floor_num = floor[:-1]
-        # Try both East and West for that floor
-        east_teams = FLOOR_TO_TEAMS.get(f"{floor_num}E", [])
-        west_teams = FLOOR_TO_TEAMS.get(f"{floor_num}W", [])
-        # Return union of both (they're usually the same anyway)
-        return list(set(east_teams + west_teams))
-
-    return []
+    """Get teams that cover a given floor (ambiguous "5?" floors included)."""
+    return FLOOR_TO_TEAMS.get(floor, []) if floor else []
 
 
 # =============================================================================
@@ -229,7 +150,7 @@ def get_patient_priority(patient: Patient) -> tuple:
         return (1, floor, patient.identifier)
 
     # 3W and IMCU (includes * patients) - NEED to go to Med 1-3
-    if floor in ['3W', 'IMCU']:
+    if floor in IMCU_FLOORS:
         return (0, floor, patient.identifier)
 
     # 3E and other geographic floors - process AFTER outliers
@@ -241,6 +162,15 @@ def optimize_placements(
     current_census: dict[int, int],
     closed_teams: set[int] = None
 ) -> list[Assignment]:
+    """Assign patients to teams; see optimize_placements_with_census."""
+    return optimize_placements_with_census(patients, current_census, closed_teams)[0]
+
+
+def optimize_placements_with_census(
+    patients: list[Patient],
+    current_census: dict[int, int],
+    closed_teams: set[int] = None
+) -> tuple[list[Assignment], list[int]]:
     """
     Assign patients to teams using weighted scoring for census, redis, and geography.
 
@@ -258,113 +188,81 @@ def optimize_placements(
     1. Never assign to closed teams
     2. Med 1-3 (IMCU) hard cap at 10 patients total
     3. Prefer teams under soft cap (14) when possible
+
+    Also returns the final census as a dense list indexed by team number
+    (slot 0 unused), so callers don't recount it from the assignments.
     """
     assignments = []
-    census = current_census.copy()
-    new_assignments = {t: 0 for t in ALL_TEAMS}  # Track NEW patients (redis) per team
+    # Dense per-team counters indexed by team number (slot 0 unused)
+    census = [current_census.get(t, 0) for t in range(max(ALL_TEAMS) + 1)]
+    new_assignments = [0] * len(census)  # Track NEW patients (redis) per team
     closed_teams = closed_teams or set()
 
     # Get list of open teams
     open_teams = [t for t in ALL_TEAMS if t not in closed_teams]
     regular_open_teams = [t for t in open_teams if t not in OVERFLOW_TEAMS]
-
-    # Sort patients: 3W/IMCU/* first, then outliers, then 3E + other geo
-    patients_sorted = sorted(patients, key=get_patient_priority)
+    # Partitions that depend only on closed teams - computed once, not per patient
+    imcu_open = [t for t in open_teams if IMCU_MASK >> t & 1]
+    closed_mask = sum(1 << t for t in closed_teams)
+    # Open teams under the soft cap; census only rises, so a team drops out
+    # once when it reaches the cap instead of being re-filtered per patient
+    regular_under_cap = [t for t in regular_open_teams if census[t] < SOFT_CAP]
+    overflow_under_cap = [t for t in open_teams if t in OVERFLOW_TEAMS and census[t] < SOFT_CAP]
+    # Regular open teams with no redis yet (bit t = Med t); cleared on first assignment
+    idle_mask = sum(1 << t for t in regular_open_teams)
+
+    # Sort patients: 3W/IMCU/* first, then outliers, then 3E + other geo.
+    # Priority depends only on the floor, so bucket by it and sort the ~12
+    # buckets; identifier order within a bucket matches the full-key sort.
+    priority_by_floor = {}
+    buckets = {}
+    for p in patients:
+        key = priority_by_floor.get(p.floor)
+        if key is None:
+            key = priority_by_floor[p.floor] = get_patient_priority(p)[:2]
+        buckets.setdefault(key, []).append(p)
+    patients_sorted = [
+        p for key in sorted(buckets)
+        for p in sorted(buckets[key], key=attrgetter('identifier'))
+    ]
+
+    # Open geographic teams as a bitmask per floor, decoded once per batch (T-lists repeat floors)
+    geo_mask_by_floor = {}
 
     for patient in patients_sorted:
-        geo_teams = set(get_geographic_teams(patient.floor) if patient.floor else [])
-        geo_teams -= closed_teams  # Remove closed teams
-
-        # Determine penalty for this patient
-        is_imcu_patient = patient.floor in ['3W', 'IMCU']
-        non_geo_penalty = IMCU_PENALTY if is_imcu_patient else GEO_PENALTY
-
-        def team_score(t: int) -> tuple[float, int, int]:
-            """
-            Score a team for this patient. Lower = better.
-            Returns (score, census, is_not_geo) for sorting.
-            """
-            c = census.get(t, 0)
-            r = new_assignments[t]
-            is_geo = t in geo_teams
-
-            # Score = census + redis + penalty
-            score = (c * CENSUS_WEIGHT) + (r * REDIS_WEIGHT)
-            if not is_geo:
-                score += non_geo_penalty
-
-            # IMCU teams are capped at 10; treat non-3W/3E patients as +4 census
-            if t in IMCU_TEAMS and patient.floor not in ['3W', '3E', 'IMCU']:
-                score += IMCU_NON_GEO_BONUS
-
-            # Penalty for piling on: if this team has 2+ redis and others have 0
-            if r >= 2:
-                teams_with_zero = [tm for tm in regular_open_teams if new_assignments[tm] == 0]
-                if teams_with_zero:
-                    score += 2.0  # Discourage giving 3rd+ patient when others have none
-
-            # Return tuple for stable sorting: (score, current_census, not_geo)
-            return (score, c, 0 if is_geo else 1)
-
-        def is_eligible(t: int) -> bool:
-            """Check if team can accept patients (hard constraints)."""
-            if t in IMCU_TEAMS:
-                current = census.get(t, 0)
-                # Hard cap at 10
-                if current >= IMCU_CAP:
-                    return False
-                # Reserve 10th slot for IMCU patients only (3W, IMCU, or * suffix)
-                if current == IMCU_CAP - 1 and patient.floor not in ['3W', 'IMCU']:
-                    return False
-            return True
-
-        # Get eligible teams, preferring regular teams over overflow
-        # First try: regular teams under soft cap
-        candidates = [t for t in regular_open_teams if is_eligible(t) and census.get(t, 0) < SOFT_CAP]
-
-        # If no regular teams under soft cap, try overflow teams
-        if not candidates:
-            overflow_open = [t for t in OVERFLOW_TEAMS if t in open_teams]
-            candidates = [t for t in overflow_open if is_eligible(t) and census.get(t, 0) < SOFT_CAP]
-
-        # If still none, allow regular teams over soft cap
-        if not candidates:
-            candidates = [t for t in regular_open_teams if is_eligible(t)]
-
-        # Last resort: any open team that's eligible
-        if not candidates:
-            candidates = [t for t in open_teams if is_eligible(t)]
-
-        if not candidates:
+        geo_mask = geo_mask_by_floor.get(patient.floor)
+        if geo_mask is None:
+            geo_mask = sum(1 << t for t in get_geographic_teams(patient.floor)) & ~closed_mask
+            geo_mask_by_floor[patient.floor] = geo_mask
+
+        picked = pick_team(patient.floor, geo_mask, census, new_assignments,
+                           open_teams, regular_open_teams, regular_under_cap,
+                           overflow_under_cap, imcu_open, idle_mask != 0)
+        if picked is None:
             print(f"WARNING: No eligible teams for {patient.raw_location}")
             continue
 
-        # Pick best team by score
-        best_team = min(candidates, key=team_score)
-        is_geo = best_team in geo_teams
-
-        # Build reason string
-        score_val = team_score(best_team)[0]
-        if is_geo:
-            reason = f"Geographic ({patient.floor} → Med {best_team}, score={score_val:.1f})"
-        else:
-            if patient.floor:
-                reason = f"Balance ({patient.floor} → Med {best_team}, score={score_val:.1f})"
-            else:
-                reason = f"No floor specified (Med {best_team}, score={score_val:.1f})"
+        best_team, score_val = picked
+        is_geo = bool(geo_mask >> best_team & 1)
 
         # Update tracking
-        census[best_team] = census.get(best_team, 0) + 1
+        census[best_team] += 1
         new_assignments[best_team] += 1
+        idle_mask &= ~(1 << best_team)
+        if census[best_team] == SOFT_CAP:
+            if best_team in OVERFLOW_TEAMS:
+                overflow_under_cap.remove(best_team)
+            else:
+                regular_under_cap.remove(best_team)
 
         assignments.append(Assignment(
             patient=patient,
             team=best_team,
             is_geographic=is_geo,
-            reason=reason
+            score=score_val
         ))
 
-    return assignments
+    return assignments, census
 
 
 # =============================================================================
@@ -387,7 +285,7 @@ def get_census_input() -> tuple[dict[int, int], set[int]]:
     closed_teams = set()
 
     for team in ALL_TEAMS:
-        floors = ', '.join(TEAM_FLOORS[team])
+        floors = _TEAM_FLOOR_STRS[team]
         imcu_marker = " [IMCU]" if team in IMCU_TEAMS else ""
         while True:
             value = input(f"  Med {team:2d} ({floors}){imcu_marker}: ").strip().upper()
@@ -407,7 +305,7 @@ def get_census_input() -> tuple[dict[int, int], set[int]]:
                 print("    Enter a number, or NA/X if closed")
 
     if closed_teams:
-        print(f"\n  Closed teams: {', '.join(f'Med {t}' for t in sorted(closed_teams))}")
+        print(f"\n  Closed teams: {', '.join(_TEAM_LABELS[t] for t in sorted(closed_teams))}")
 
     return census, closed_teams
 
@@ -469,7 +367,7 @@ def get_patients_input() -> list[Patient]:
         if floor:
             geo_teams = get_geographic_teams(floor)
             if geo_teams:
-                teams_str = ', '.join(f"Med {t}" for t in geo_teams)
+                teams_str = ', '.join(_TEAM_LABELS[t] for t in geo_teams)
                 imcu_note = " [IMCU priority]" if is_imcu_override else ""
                 print(f"         → {floor} (geographic: {teams_str}){imcu_note}")
             else:
@@ -485,69 +383,73 @@ def get_patients_input() -> list[Patient]:
     return patients
 
 
-def display_results(assignments: list[Assignment], final_census: dict[int, int], starting_census: dict[int, int], closed_teams: set[int] = None):
-    """Display the recommended assignments."""
+def display_results(assignments: list[Assignment], finals: list[int], starting_census: dict[int, int], closed_teams: set[int] = None):
+    """Display the recommended assignments. finals is the optimizer's dense final census."""
     closed_teams = closed_teams or set()
-    print("\n" + "=" * 60)
-    print("RECOMMENDED ASSIGNMENTS")
-    print("=" * 60)
+    # Snapshot starting census into a dense per-team list (slot 0 unused) for both team passes
+    starts = [starting_census.get(t, 0) for t in range(max(ALL_TEAMS) + 1)]
+
+    # Collect output lines and write once at the end
+    out = []
+    out.append("\n" + "=" * 60)
+    out.append("RECOMMENDED ASSIGNMENTS")
+    out.append("=" * 60)
 
     # Group by team
-    by_team = defaultdict(list)
+    by_team = {}
     for a in assignments:
-        by_team[a.team].append(a)
+        by_team.setdefault(a.team, []).append(a)
 
     geo_count = sum(1 for a in assignments if a.is_geographic)
     total = len(assignments)
 
-    print(f"\nTotal patients to place: {total}")
-    print(f"Geographic placements: {geo_count} ({100*geo_count//total if total else 0}%)")
-    print(f"Non-geographic: {total - geo_count}")
+    out.append(f"\nTotal patients to place: {total}")
+    out.append(f"Geographic placements: {geo_count} ({100*geo_count//total if total else 0}%)")
+    out.append(f"Non-geographic: {total - geo_count}")
 
-    print("\n" + "-" * 60)
-    print("BY TEAM:")
-    print("-" * 60)
+    out.append("\n" + "-" * 60)
+    out.append("BY TEAM:")
+    out.append("-" * 60)
 
     for team in ALL_TEAMS:
-        team_assignments = by_team[team]
+        team_assignments = by_team.get(team, ())
         new_count = len(team_assignments)
-        if new_count > 0 or final_census.get(team, 0) > 0:
-            floors = ', '.join(TEAM_FLOORS[team])
+        final = finals[team]
+        if new_count > 0 or final > 0:
+            floors = _TEAM_FLOOR_STRS[team]
             imcu_marker = " [IMCU cap:10]" if team in IMCU_TEAMS else ""
-            start = starting_census.get(team, 0)
-            final = final_census.get(team, 0)
-            print(f"\nMed {team} ({floors}){imcu_marker}")
-            print(f"  Census: {start} → {final} (+{new_count} new)")
+            out.append(f"\n{_TEAM_LABELS[team]} ({floors}){imcu_marker}")
+            out.append(f"  Census: {starts[team]} → {final} (+{new_count} new)")
             for a in team_assignments:
                 geo_marker = "✓" if a.is_geographic else "✗"
-                print(f"    {geo_marker} {a.patient.raw_location:15} ({a.patient.floor or '?'})")
+                out.append(f"    {geo_marker} {a.patient.raw_location:15} ({a.patient.floor or '?'})")
 
-    print("\n" + "-" * 60)
-    print("ASSIGNMENT LIST (copy/paste ready):")
-    print("-" * 60)
-    print()
+    out.append("\n" + "-" * 60)
+    out.append("ASSIGNMENT LIST (copy/paste ready):")
+    out.append("-" * 60)
+    out.append("")
 
     for a in assignments:
         geo_marker = "GEO" if a.is_geographic else "   "
-        print(f"  {a.patient.raw_location:15} → Med {a.team:2d}  {geo_marker}")
+        out.append(f"  {a.patient.raw_location:15} → Med {a.team:2d}  {geo_marker}")
 
-    print("\n" + "-" * 60)
-    print("FINAL CENSUS SUMMARY:")
-    print("-" * 60)
-    print()
-    print("  Team    Start  +New  =Final")
-    print("  " + "-" * 30)
+    out.append("\n" + "-" * 60)
+    out.append("FINAL CENSUS SUMMARY:")
+    out.append("-" * 60)
+    out.append("")
+    out.append("  Team    Start  +New  =Final")
+    out.append("  " + "-" * 30)
 
     for team in ALL_TEAMS:
         if team in closed_teams:
             imcu = "*" if team in IMCU_TEAMS else " "
-            print(f"  Med {team:2d}{imcu}   --   CLOSED")
+            out.append(f"  Med {team:2d}{imcu}   --   CLOSED")
             continue
 
-        start = starting_census.get(team, 0)
-        final = final_census.get(team, 0)
+        start = starts[team]
+        final = finals[team]
         new = final - start
-        bar = "█" * min(final, 20)  # Cap bar length at 20
+        bar = _BARS[max(0, min(final, 20))]  # Cap bar length at 20
         if final > 20:
             bar += "+"
         imcu = "*" if team in IMCU_TEAMS else " "
@@ -557,11 +459,13 @@ def display_results(assignments: list[Assignment], final_census: dict[int, int],
             cap_warning = " ⚠️ HIGH"
         else:
             cap_warning = ""
-        print(f"  Med {team:2d}{imcu}  {start:3d}   +{new:2d}   ={final:3d}  {bar}{cap_warning}")
+        out.append(f"  Med {team:2d}{imcu}  {start:3d}   +{new:2d}   ={final:3d}  {bar}{cap_warning}")
 
-    print()
-    print("  * = IMCU team (hard cap: 10)")
-    print(f"  Other teams soft cap: {SOFT_CAP}")
+    out.append("")
+    out.append("  * = IMCU team (hard cap: 10)")
+    out.append(f"  Other teams soft cap: {SOFT_CAP}")
+
+    print("\n".join(out))
 
 
 def run_interactive():
@@ -593,12 +497,7 @@ def run_interactive():
     print("OPTIMIZING...")
     print("=" * 60)
 
-    assignments = optimize_placements(patients, census, closed_teams)
-
-    # Calculate final census
-    final_census = census.copy()
-    for a in assignments:
-        final_census[a.team] = final_census.get(a.team, 0) + 1
+    assignments, final_census = optimize_placements_with_census(patients, census, closed_teams)
 
     # Display results
     display_results(assignments, final_census, census, closed_teams)
@@ -637,11 +536,7 @@ def run_quick_mode():
     # Assume starting census of 0 for quick distribution, no closed teams
     census = {t: 0 for t in ALL_TEAMS}
     closed_teams = set()
-    assignments = optimize_placements(patients, census, closed_teams)
-
-    final_census = {t: 0 for t in ALL_TEAMS}
-    for a in assignments:
-        final_census[a.team] += 1
+    assignments, final_census = optimize_placements_with_census(patients, census, closed_teams)
 
     display_results(assignments, final_census, census, closed_teams)
 
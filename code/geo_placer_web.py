@@ -7,17 +7,30 @@ Run locally: streamlit run geo_placer_web.py
 
 import streamlit as st
 import streamlit.components.v1 as components
+import io
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional
 from collections import defaultdict
 from datetime import datetime, timedelta
+from operator import attrgetter
 from pathlib import Path
 from PIL import Image, ImageFilter, ImageEnhance, ImageOps
 import yaml
 from docx import Document
 import pandas as pd
 
+from geo_core import (
+    IMCU_CAP,
+    IMCU_FLOORS,
+    IMCU_MASK,
+    IMCU_TEAMS,
+    add_ambiguous_floors,
+    normalize_floor,
+    pick_team,
+)
+
 try:
     import pytesseract
     OCR_AVAILABLE = True
@@ -34,6 +47,9 @@ except ImportError:
 LOGO_PATH = str(Path(__file__).parent.parent / "assets" / "logo.png")
 
 
+_OSD_ROTATE_RE = re.compile(r'Rotate: (\d+)')  # Tesseract OSD rotation line
+
+
 def preprocess_image_for_ocr(image):
     """
     Preprocess image to improve OCR accuracy, especially for camera photos.
@@ -58,7 +74,7 @@ def preprocess_image_for_ocr(image):
     # Try to detect if image needs rotation using Tesseract OSD
     try:
         osd = pytesseract.image_to_osd(enhanced)
-        rotation_match = re.search(r'Rotate: (\d+)', osd)
+        rotation_match = _OSD_ROTATE_RE.search(osd)
         if rotation_match:
             rotation = int(rotation_match.group(1))
             if rotation != 0:
@@ -71,10 +87,33 @@ def preprocess_image_for_ocr(image):
     return enhanced
 
 
+# Pairs an upright read needs before the 90° pass may be skipped
+OCR_CONFIDENT_PAIRS = 5
+# Tesseract page segmentation modes tried per rotation, best first
+OCR_PSMS = (6, 4)
+# OSD orientation confidence below this is a guess; fall back to trying 90°
+OSD_MIN_CONFIDENCE = 2.0
+
+
+def detect_rotation(image) -> Optional[int]:
+    """
+    Ask Tesseract OSD how far the image is rotated (0, 90, 180 or 270).
+    Returns None when OSD fails or isn't confident.
+    """
+    try:
+        osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+    except Exception:
+        # OSD needs enough text to work with and raises otherwise
+        return None
+    if osd.get('orientation_conf', 0) < OSD_MIN_CONFIDENCE:
+        return None
+    return int(osd['rotate'])
+
+
 def try_all_rotations(image):
     """
-    Try OCR on all 4 rotations and return the best result.
-    Useful when OSD detection fails.
+    OCR upright, then at the rotation OSD suggests, and return the best result.
+    Falls back to 90° when OSD detection fails.
     """
     best_pairs = []
     best_text = ""
@@ -83,31 +122,37 @@ def try_all_rotations(image):
     last_error = None
     any_success = False
 
-    # Resize large images for faster OCR (max 1500px on longest side)
+    # Grayscale first so the resample touches one channel, not three or four;
+    # thumbnail shrinks in place (max 1500px on longest side) and skips small images
     max_dimension = 1500
-    if max(image.size) > max_dimension:
-        ratio = max_dimension / max(image.size)
-        new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
-        image = image.resize(new_size, Image.LANCZOS)
-
     gray = image.convert('L')
+    gray.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
 
     # Apply preprocessing
     blurred = gray.filter(ImageFilter.GaussianBlur(radius=0.5))
     enhancer = ImageEnhance.Contrast(blurred)
     enhanced = enhancer.enhance(1.5)
 
-    # Try 0° and 90° (covers landscape/portrait), with 2 best PSM modes
-    for rotation in [0, 90]:
+    # Read upright first; if that isn't convincing, one OSD pass picks the
+    # second rotation (90° when OSD can't tell), with 2 best PSM modes each
+    rotation = 0
+    while rotation is not None:
         if rotation == 0:
             rotated = enhanced
         else:
             rotated = enhanced.rotate(-rotation, expand=True)
 
-        for psm in [6, 4]:
-            config = f'--psm {psm}'
+        # Each image_to_string call is a Tesseract subprocess, so the PSM
+        # runs overlap in threads; results are still scored in OCR_PSMS order
+        with ThreadPoolExecutor(max_workers=len(OCR_PSMS)) as pool:
+            futures = [
+                pool.submit(pytesseract.image_to_string, rotated, config=f'--psm {psm}')
+                for psm in OCR_PSMS
+            ]
+
+        for psm, future in zip(OCR_PSMS, futures):
             try:
-                raw_text = pytesseract.image_to_string(rotated, config=config)
+                raw_text = future.result()
                 any_success = True
                 pairs = extract_from_ocr(raw_text)
                 if len(pairs) > len(best_pairs):
@@ -122,12 +167,44 @@ def try_all_rotations(image):
                 last_error = str(e)
                 continue
 
+        if rotation != 0:
+            break
+        # A landscape image whose upright read paired every "Med N" it found
+        # is done - skip the second pass
+        if (image.width >= image.height
+                and len(best_pairs) >= OCR_CONFIDENT_PAIRS
+                and len(best_pairs) >= len(_OCR_TEAM_RE.findall(best_text))):
+            break
+        rotation = detect_rotation(enhanced)
+        if rotation is None:
+            rotation = 90
+        elif rotation == 0:
+            # OSD says it's already upright, so turning it won't read better
+            break
+
     # If no success at all, raise the last error
     if not any_success and last_error:
         raise Exception(f"OCR failed: {last_error}")
 
     return best_pairs, best_text, best_rotation, best_psm
 
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def ocr_screenshot(image_bytes: bytes):
+    """
+    Run rotation-aware OCR on an uploaded screenshot's raw bytes.
+    Cached on the bytes, so reruns and re-uploads of the same image skip Tesseract.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+
+    # Try EXIF transpose first (handles phone photo orientation)
+    try:
+        image = ImageOps.exif_transpose(image)
+    except Exception:
+        pass
+
+    return try_all_rotations(image)
+
 # =============================================================================
 # GEOGRAPHIC MAPPINGS
 # =============================================================================
@@ -142,6 +219,10 @@ FLOOR_TO_TEAMS = {
     'IMCU': [1, 2, 3],
     'BOYER': [12, 6],
 }
+add_ambiguous_floors(FLOOR_TO_TEAMS)  # "5?" → union of 5E/5W teams
+
+# Immutable floor → teams lookup, shared by every get_geographic_teams call
+GEO_TEAMS = {floor: tuple(teams) for floor, teams in FLOOR_TO_TEAMS.items()}
 
 TEAM_FLOORS = {
     1: ['3W', '3E', 'IMCU'], 2: ['3W', '3E', 'IMCU'], 3: ['3W', '3E', 'IMCU'],
@@ -159,20 +240,10 @@ TEAM_FLOORS_STR = {
     13: "Overflow", 14: "Overflow", 15: "Overflow",
 }
 
-ALL_TEAMS = list(range(1, 16))
-OVERFLOW_TEAMS = []  # All teams regular when enabled; checkboxes control availability
-IMCU_TEAMS = [1, 2, 3]
-IMCU_CAP = 10
+ALL_TEAMS = tuple(range(1, 16))
+OVERFLOW_TEAMS = frozenset()  # All teams regular when enabled; checkboxes control availability
 SOFT_CAP = 14
 
-# Scoring weights (lower score = better)
-# score = (census * CENSUS_WEIGHT) + (redis * REDIS_WEIGHT) + penalty
-CENSUS_WEIGHT = 1.0
-REDIS_WEIGHT = 1.0
-GEO_PENALTY = 3.0      # Penalty for non-geographic placement
-IMCU_PENALTY = 10.0    # Higher penalty for 3W/IMCU patients going off-floor
-IMCU_NON_GEO_BONUS = 4.0  # Extra score for non-3W/3E patients going to IMCU teams
-
 # Demo data
 DEMO_CENSUS = {
     1: 8, 2: 7, 3: 9,       # IMCU teams
@@ -191,7 +262,7 @@ DEMO_PATIENTS = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class Patient:
     identifier: str
     floor: str
@@ -199,15 +270,23 @@ class Patient:
     admitted_by: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Assignment:
     patient: Patient
     team: int
     is_geographic: bool
-    reason: str
+
+    @property
+    def reason(self) -> str:
+        """Why this team was picked. Formatted on access, not in the placement loop."""
+        if self.is_geographic:
+            return f"Geographic ({self.patient.floor} → Med {self.team})"
+        if self.patient.floor:
+            return f"Balance ({self.patient.floor} → Med {self.team})"
+        return f"No floor specified (Med {self.team})"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ExistingPatient:
     room: str
     current_team: int
@@ -218,73 +297,10 @@ class ExistingPatient:
 # FLOOR PARSING
 # =============================================================================
 
-def normalize_floor(location: str) -> Optional[str]:
-    original = location.strip().upper()
-
-    if 'IMCU' in original:
-        return 'IMCU'
-    if 'OVERNIGHT' in original or 'ONR' in original or 'RECOVERY' in original:
-        return 'BOYER'
-    if original.startswith('RZ'):
-        return 'BOYER'
-    if original.startswith('Y'):
-        return 'BOYER'
-    if any(x in original for x in ['ED', 'EMERGENCY', 'ER ']):
-        return None
-    if 'BOYER' in original:
-        return 'BOYER'
-    if original == 'MAIN':
-        return None
-
-    location = re.sub(r'[A-Z]$', '', original)
-
-    match = re.search(r'(\d+)\s*([EW]|EAST|WEST)', location)
-    if match:
-        floor_num = match.group(1)
-        direction = match.group(2)[0]
-        if floor_num == '9' and direction == 'W':
-            return 'BOYER'
-        return f"{floor_num}{direction}"
-
-    match = re.search(r'\b(\d)(\d{2})\b', location)
-    if match:
-        floor_num = match.group(1)
-        room_num = int(match.group(2))
-
-        if floor_num == '7' and room_num >= 50:
-            return 'BOYER'
-        if floor_num == '8' and room_num >= 50:
-            return 'BOYER'
-        if floor_num == '9':
-            return 'BOYER'
-
-        if 1 <= room_num <= 20:
-            return f"{floor_num}W"
-        elif 30 <= room_num < 50:
-            return f"{floor_num}E"
-        else:
-            return f"{floor_num}?"
-
-    match = re.search(r'FLOOR\s*(\d+)\s*(EAST|WEST|E|W)', location)
-    if match:
-        floor_num = match.group(1)
-        direction = match.group(2)[0]
-        return f"{floor_num}{direction}"
-
-    return None
-
+# normalize_floor is shared with the CLI version - see geo_core.py
 
-def get_geographic_teams(floor: str) -> list[int]:
-    if not floor:
-        return []
-    if floor in FLOOR_TO_TEAMS:
-        return FLOOR_TO_TEAMS[floor]
-    if floor.endswith('?'):
-        floor_num = floor[:-1]
-        east_teams = FLOOR_TO_TEAMS.get(f"{floor_num}E", [])
-        west_teams = FLOOR_TO_TEAMS.get(f"{floor_num}W", [])
-        return list(set(east_teams + west_teams))
-    return []
+def get_geographic_teams(floor: str) -> tuple[int, ...]:
+    return GEO_TEAMS.get(floor, ())
 
 
 # =============================================================================
@@ -311,7 +327,7 @@ def get_patient_priority(patient: Patient) -> tuple:
         return (1, floor, patient.identifier)
 
     # 3W and IMCU (includes * patients) - NEED to go to Med 1-3
-    if floor in ['3W', 'IMCU']:
+    if floor in IMCU_FLOORS:
         return (0, floor, patient.identifier)
 
     # 3E and other geographic floors - process AFTER outliers
@@ -323,8 +339,18 @@ def optimize_placements(
     current_census: dict[int, int],
     closed_teams: set[int] = None
 ) -> list[Assignment]:
+    """Assign patients to teams. See optimize_placements_with_census."""
+    return optimize_placements_with_census(patients, current_census, closed_teams)[0]
+
+
+def optimize_placements_with_census(
+    patients: list[Patient],
+    current_census: dict[int, int],
+    closed_teams: set[int] = None
+) -> tuple[list[Assignment], list[int]]:
     """
     Assign patients to teams using weighted scoring for census, redis, and geography.
+    Returns the assignments and the final census as a dense per-team list (slot 0 unused).
 
     Scoring: score = (census * CENSUS_WEIGHT) + (redis * REDIS_WEIGHT) + penalty
     - penalty = 0 if geographic
@@ -337,116 +363,139 @@ def optimize_placements(
     IMCU teams at census 9 reserve the 10th slot for IMCU patients only.
     """
     assignments = []
-    census = current_census.copy()
-    new_assignments = {t: 0 for t in ALL_TEAMS}
+    # Dense per-team counters indexed by team number (slot 0 unused)
+    census = [current_census.get(t, 0) for t in range(max(ALL_TEAMS) + 1)]
+    new_assignments = [0] * len(census)
     closed_teams = closed_teams or set()
 
     open_teams = [t for t in ALL_TEAMS if t not in closed_teams]
     regular_open_teams = [t for t in open_teams if t not in OVERFLOW_TEAMS]
+    # Depend only on closed teams - computed once, not per patient
+    imcu_open = [t for t in open_teams if IMCU_MASK >> t & 1]
+    closed_mask = sum(1 << t for t in closed_teams)
+    # Regular open teams with no redis yet (bit t = Med t); cleared on first assignment
+    idle_mask = sum(1 << t for t in regular_open_teams)
+    # Open teams under the soft cap; census only rises, so a team drops out
+    # once when it reaches the cap instead of being re-filtered per patient
+    regular_under_cap = [t for t in regular_open_teams if census[t] < SOFT_CAP]
+    overflow_under_cap = [t for t in open_teams if t in OVERFLOW_TEAMS and census[t] < SOFT_CAP]
+
+    # Sort patients: 3W/IMCU/* first, then outliers, then 3E + other geo.
+    # Priority depends only on the floor, so bucket by it and sort the ~12
+    # buckets; identifier order within a bucket matches the full-key sort.
+    priority_by_floor = {}
+    buckets = {}
+    for p in patients:
+        key = priority_by_floor.get(p.floor)
+        if key is None:
+            key = priority_by_floor[p.floor] = get_patient_priority(p)[:2]
+        buckets.setdefault(key, []).append(p)
+    patients_sorted = [
+        p for key in sorted(buckets)
+        for p in sorted(buckets[key], key=attrgetter('identifier'))
+    ]
 
-    # Sort patients: 3W/IMCU/* first, then outliers, then 3E + other geo
-    patients_sorted = sorted(patients, key=get_patient_priority)
+    # Open geographic teams as a bitmask per floor - only ~12 distinct floors per batch
+    geo_mask_by_floor = {}
 
     for patient in patients_sorted:
-        geo_teams = set(get_geographic_teams(patient.floor) if patient.floor else [])
-        geo_teams -= closed_teams
-
-        # Determine penalty for this patient
-        is_imcu_patient = patient.floor in ['3W', 'IMCU']
-        non_geo_penalty = IMCU_PENALTY if is_imcu_patient else GEO_PENALTY
-
-        def team_score(t: int) -> tuple[float, int, int]:
-            """Score a team for this patient. Lower = better."""
-            c = census.get(t, 0)
-            r = new_assignments[t]
-            is_geo = t in geo_teams
-
-            score = (c * CENSUS_WEIGHT) + (r * REDIS_WEIGHT)
-            if not is_geo:
-                score += non_geo_penalty
-
-            # IMCU teams are capped at 10; treat non-3W/3E patients as +4 census
-            if t in IMCU_TEAMS and patient.floor not in ['3W', '3E', 'IMCU']:
-                score += IMCU_NON_GEO_BONUS
-
-            # Penalty for piling on: if this team has 2+ redis and others have 0
-            if r >= 2:
-                teams_with_zero = [tm for tm in regular_open_teams if new_assignments[tm] == 0]
-                if teams_with_zero:
-                    score += 2.0  # Discourage giving 3rd+ patient when others have none
-
-            return (score, c, 0 if is_geo else 1)
-
-        def is_eligible(t: int) -> bool:
-            """Check if team can accept patients."""
-            if t in IMCU_TEAMS:
-                current = census.get(t, 0)
-                # Hard cap at 10
-                if current >= IMCU_CAP:
-                    return False
-                # Reserve 10th slot for IMCU patients only
-                if current == IMCU_CAP - 1 and patient.floor not in ['3W', 'IMCU']:
-                    return False
-            return True
-
-        # Get eligible teams, preferring regular teams over overflow
-        candidates = [t for t in regular_open_teams if is_eligible(t) and census.get(t, 0) < SOFT_CAP]
-
-        if not candidates:
-            overflow_open = [t for t in OVERFLOW_TEAMS if t in open_teams]
-            candidates = [t for t in overflow_open if is_eligible(t) and census.get(t, 0) < SOFT_CAP]
-
-        if not candidates:
-            candidates = [t for t in regular_open_teams if is_eligible(t)]
-
-        if not candidates:
-            candidates = [t for t in open_teams if is_eligible(t)]
-
-        if not candidates:
+        geo_mask = geo_mask_by_floor.get(patient.floor)
+        if geo_mask is None:
+            geo_mask = sum(1 << t for t in get_geographic_teams(patient.floor)) & ~closed_mask
+            geo_mask_by_floor[patient.floor] = geo_mask
+
+        picked = pick_team(patient.floor, geo_mask, census, new_assignments,
+                           open_teams, regular_open_teams, regular_under_cap,
+                           overflow_under_cap, imcu_open, idle_mask != 0)
+        if picked is None:
             continue
+        best_team = picked[0]
+        is_geo = bool(geo_mask >> best_team & 1)
 
-        # Pick best team by score
-        best_team = min(candidates, key=team_score)
-        is_geo = best_team in geo_teams
-
-        # Build reason string
-        score_val = team_score(best_team)[0]
-        if is_geo:
-            reason = f"Geographic ({patient.floor} → Med {best_team})"
-        else:
-            if patient.floor:
-                reason = f"Balance ({patient.floor} → Med {best_team})"
-            else:
-                reason = f"No floor specified (Med {best_team})"
-
-        census[best_team] = census.get(best_team, 0) + 1
+        census[best_team] += 1
         new_assignments[best_team] += 1
+        idle_mask &= ~(1 << best_team)
+        if census[best_team] == SOFT_CAP:
+            if best_team in OVERFLOW_TEAMS:
+                overflow_under_cap.remove(best_team)
+            else:
+                regular_under_cap.remove(best_team)
 
         assignments.append(Assignment(
             patient=patient,
             team=best_team,
-            is_geographic=is_geo,
-            reason=reason
+            is_geographic=is_geo
         ))
 
-    return assignments
+    return assignments, census
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_optimize_cached(
+    patients_key: tuple[tuple[str, Optional[str], str, str], ...],
+    census_key: tuple[tuple[int, int], ...],
+    closed_key: tuple[int, ...],
+) -> tuple[list[Assignment], list[int]]:
+    """
+    optimize_placements_with_census memoized on a hashable snapshot of its inputs.
+    Re-clicking Optimize with unchanged census and patient lists reuses the result.
+    """
+    patients = [Patient(*fields) for fields in patients_key]
+    return optimize_placements_with_census(patients, dict(census_key), set(closed_key))
 
 
 # =============================================================================
 # MONDAY SHUFFLE FUNCTIONS
 # =============================================================================
 
+def _lowest_count(teams, counts: dict):
+    """
+    First team with the lowest count (missing = 0), or None if teams is empty.
+
+    Same pick as min(teams, key=lambda t: counts.get(t, 0)), without the per-call lambda.
+    """
+    best = None
+    best_count = 0
+    for t in teams:
+        c = counts.get(t, 0)
+        if best is None or c < best_count:
+            best, best_count = t, c
+    return best
+
+
+# Shuffle: IMCU teams at this projected census are a last resort
+SHUFFLE_IMCU_TARGET = 9
+# Shuffle: open overflow teams once every geographic team is at this census
+OVERFLOW_THRESHOLD = 10
+
+
+def _pick_shuffle_team(options: list[int], projected_census: dict[int, int]) -> Optional[int]:
+    """
+    Lowest projected census among options, with IMCU teams at SHUFFLE_IMCU_TARGET
+    scored +100. First minimum wins, as min(options, key=...) would.
+    """
+    best = None
+    best_score = 0
+    for t in options:
+        score = projected_census.get(t, 0)
+        if score >= SHUFFLE_IMCU_TARGET and t in IMCU_TEAMS:
+            score += 100
+        if best is None or score < best_score:
+            best, best_score = t, score
+    return best
+
+
 def analyze_patients(
     patients: list[ExistingPatient],
     closed_teams: set[int] = None
 ) -> tuple[list[tuple[ExistingPatient, list[int]]], list[ExistingPatient]]:
-    closed_teams = closed_teams or set()
+    closed_mask = sum(1 << t for t in closed_teams or ())  # Bit t set = Med t closed
     wrong_team = []
     ok_team = []
 
     for patient in patients:
-        geo_teams = get_geographic_teams(patient.floor) if patient.floor else []
-        acceptable_teams = [t for t in geo_teams if t not in closed_teams]
+        geo_teams = get_geographic_teams(patient.floor) if patient.floor else ()
+        acceptable_teams = [t for t in geo_teams if not closed_mask >> t & 1]
 
         if patient.current_team in acceptable_teams:
             ok_team.append(patient)
@@ -458,60 +507,67 @@ def analyze_patients(
     return wrong_team, ok_team
 
 
+# One OCR line holding both a room and a "Med N" team, found in a single pass
+# over the whole text: each lookahead takes the first match on that line
+_OCR_LINE_PAIR_RE = re.compile(
+    r'^(?=[^\n]*?\b(\d{3}[A-Z]?|[A-Z]{2,4}\d{0,2}[A-Z]?|\d{4}[A-Z]?)\b)'
+    r'(?=[^\n]*?Med[^\S\n]*(\d{1,2}))',
+    re.IGNORECASE | re.MULTILINE,
+)
+# Fallback scans over the whole OCR text, and the manual paste parser
+_OCR_ROOM_RE = re.compile(r'\b(\d{3,4}[A-Z]?)\b', re.IGNORECASE)
+_OCR_SPECIAL_ROOM_RE = re.compile(r'\b([A-Z]{2,4}\d{1,2})\b')
+_OCR_NAMED_ROOM_RE = re.compile(r'\b(MAIN|ICU\d*|IMCU\d*)\b', re.IGNORECASE)
+_OCR_TEAM_RE = re.compile(r'Med\s*(\d{1,2})', re.IGNORECASE)
+_OCR_NON_ROOMS = frozenset({'BED', 'PRIMARY', 'TEAM', 'MED'})  # Header words that look like rooms
+_OCR_GARBAGE = frozenset({'MED', 'BED', 'TEAM', 'PRIMARY', 'POSE', 'TAA', 'ATTA'})  # Misreads fix_ocr_room drops
+_ROOM_NUMBER_RE = re.compile(r'^\d{3}[A-Z]?$')
+_PASTE_ROOM_RE = re.compile(r'\b(\d{3}[A-Z]?)\b', re.IGNORECASE)
+_PASTE_TEAM_RE = re.compile(r'(?:Med\s*)?(\d{1,2})\b', re.IGNORECASE)
+
+
 def extract_from_ocr(text: str) -> list[tuple[str, int]]:
     pairs = []
     seen_rooms = set()
-    room_pattern = r'\b(\d{3}[A-Z]?|[A-Z]{2,4}\d{0,2}[A-Z]?|\d{4}[A-Z]?)\b'
 
-    for line in text.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
+    for match in _OCR_LINE_PAIR_RE.finditer(text):
+        line_end = text.find('\n', match.start())
+        line = text[match.start():line_end] if line_end != -1 else text[match.start():]
         if 'Primary' in line or 'Bed' in line and 'Team' in line:
             continue
 
-        room_match = re.search(room_pattern, line, re.IGNORECASE)
-        team_match = re.search(r'Med\s*(\d{1,2})', line, re.IGNORECASE)
-
-        if room_match and team_match:
-            room = room_match.group(1).upper()
-            team = int(team_match.group(1))
-            if room in ('BED', 'PRIMARY', 'TEAM'):
-                continue
-            if room not in seen_rooms and 1 <= team <= 15:
-                seen_rooms.add(room)
-                pairs.append((room, team))
+        room = match.group(1).upper()
+        team = int(match.group(2))
+        if room in ('BED', 'PRIMARY', 'TEAM'):
+            continue
+        if room not in seen_rooms and 1 <= team <= 15:
+            seen_rooms.add(room)
+            pairs.append((room, team))
 
-    all_rooms = re.findall(r'\b(\d{3,4}[A-Z]?)\b', text, re.IGNORECASE)
-    special_rooms = re.findall(r'\b([A-Z]{2,4}\d{1,2})\b', text)
-    special_rooms += re.findall(r'\b(MAIN|ICU\d*|IMCU\d*)\b', text, re.IGNORECASE)
+    all_rooms = _OCR_ROOM_RE.findall(text)
+    special_rooms = _OCR_SPECIAL_ROOM_RE.findall(text)
+    special_rooms += _OCR_NAMED_ROOM_RE.findall(text)
 
-    unique_rooms = []
-    for r in all_rooms + special_rooms:
-        r_upper = r.upper()
-        if r_upper not in unique_rooms and r_upper not in ('BED', 'PRIMARY', 'TEAM', 'MED'):
-            unique_rooms.append(r_upper)
+    # First-seen order, deduped by dict keys rather than scanning the list per room
+    unique_rooms = [r for r in dict.fromkeys(r.upper() for r in all_rooms + special_rooms)
+                    if r not in _OCR_NON_ROOMS]
 
-    all_teams = re.findall(r'Med\s*(\d{1,2})', text, re.IGNORECASE)
+    all_teams = _OCR_TEAM_RE.findall(text)
     all_teams = [int(t) for t in all_teams if 1 <= int(t) <= 15]
 
     if len(pairs) >= 5 and abs(len(pairs) - len(all_teams)) <= 3:
         return pairs
 
-    if len(unique_rooms) > 0 and len(all_teams) > 0:
-        min_len = min(len(unique_rooms), len(all_teams))
-        for room, team in zip(unique_rooms[:min_len], all_teams[:min_len]):
-            if room not in seen_rooms:
-                seen_rooms.add(room)
-                pairs.append((room, team))
+    # Positional fallback: zip stops at the shorter list, and unique_rooms has
+    # no repeats, so only rooms already paired above need skipping
+    pairs.extend((room, team) for room, team in zip(unique_rooms, all_teams) if room not in seen_rooms)
 
     return pairs
 
 
 def fix_ocr_room(room: str) -> str:
     room = room.upper()
-    garbage = ['MED', 'BED', 'TEAM', 'PRIMARY', 'POSE', 'TAA', 'ATTA']
-    if room in garbage:
+    if room in _OCR_GARBAGE:
         return None
 
     if len(room) == 4 and room.isdigit():
@@ -523,7 +579,7 @@ def fix_ocr_room(room: str) -> str:
 
     if room.startswith('T') and len(room) >= 3:
         fixed = '7' + room[1:]
-        if re.match(r'^\d{3}[A-Z]?$', fixed):
+        if _ROOM_NUMBER_RE.match(fixed):
             room = fixed
 
     return room
@@ -533,20 +589,9 @@ def fix_ocr_room(room: str) -> str:
 # STREAMLIT UI
 # =============================================================================
 
-st.set_page_config(
-    page_title="Geo Owl",
-    page_icon=LOGO_PATH,
-    layout="wide"
-)
-
-
-# Initialize dark mode based on time of day (dark after 7pm, before 7am)
-if 'dark_mode' not in st.session_state:
-    hour = datetime.now().hour
-    st.session_state.dark_mode = hour >= 19 or hour < 7
-
+# Static HTML/JS for components.html, built once at import
 # JavaScript to make Enter key move to next input field
-components.html("""
+_ENTER_NAV_HTML = """
 <script>
 const doc = window.parent.document;
 doc.addEventListener('keydown', function(e) {
@@ -560,7 +605,62 @@ doc.addEventListener('keydown', function(e) {
     }
 });
 </script>
-""", height=0)
+"""
+
+# EPIC message box with copy button; only {epic_message} varies per render
+_EPIC_MESSAGE_HTML = """
+<style>
+    .epic-container {{
+        font-family: monospace;
+        background-color: #f0f2f6;
+        border-radius: 5px;
+        padding: 10px;
+        white-space: pre-wrap;
+        font-size: 14px;
+        line-height: 1.4;
+    }}
+    .copy-btn {{
+        background-color: #9D2235;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 5px;
+        cursor: pointer;
+        margin-bottom: 10px;
+        font-weight: bold;
+    }}
+    .copy-btn:hover {{
+        background-color: #7A1A2A;
+    }}
+</style>
+<button class="copy-btn" onclick="copyToClipboard()">Copy Message</button>
+<div class="epic-container" id="epicMsg">{epic_message}</div>
+<script>
+    function copyToClipboard() {{
+        const text = document.getElementById('epicMsg').innerText;
+        navigator.clipboard.writeText(text).then(() => {{
+            const btn = document.querySelector('.copy-btn');
+            btn.innerText = 'Copied!';
+            setTimeout(() => {{ btn.innerText = 'Copy Message'; }}, 2000);
+        }});
+    }}
+</script>
+"""
+
+
+st.set_page_config(
+    page_title="Geo Owl",
+    page_icon=LOGO_PATH,
+    layout="wide"
+)
+
+
+# Initialize dark mode based on time of day (dark after 7pm, before 7am)
+if 'dark_mode' not in st.session_state:
+    hour = datetime.now().hour
+    st.session_state.dark_mode = hour >= 19 or hour < 7
+
+components.html(_ENTER_NAV_HTML, height=0)
 
 # Temple University red for buttons + dark mode styles
 base_css = """
@@ -696,125 +796,131 @@ with tab_nights:
     if 'demo_mode' not in st.session_state:
         st.session_state.demo_mode = False
 
-    # Create 6 columns: Census + 4 Doctors + Other side by side
-    census_col, doc1_col, doc2_col, doc3_col, doc4_col, other_col = st.columns([1, 1, 1, 1, 1, 1])
+    # Census and patient inputs sit in one form: edits don't rerun the page,
+    # everything is read in a single rerun when a button is pressed. Enter
+    # moves between fields (see _ENTER_NAV_HTML) instead of submitting.
+    with st.form("nights_form", enter_to_submit=False, border=False):
+        # Create 6 columns: Census + 4 Doctors + Other side by side
+        census_col, doc1_col, doc2_col, doc3_col, doc4_col, other_col = st.columns([1, 1, 1, 1, 1, 1])
 
-    # Column 1: Team Census (compact layout)
-    with census_col:
-        st.subheader("Census")
-        st.caption("✓ = accept redis")
+        # Column 1: Team Census (compact layout)
+        with census_col:
+            st.subheader("Census")
+            st.caption("✓ = accept redis")
 
-        nights_census = {}
-        nights_closed_teams = set()
+            nights_census = {}
+            nights_closed_teams = set()
 
-        # Key suffix changes with demo mode to force widget re-render
-        key_suffix = "_demo" if st.session_state.demo_mode else ""
+            # Key suffix changes with demo mode to force widget re-render
+            key_suffix = "_demo" if st.session_state.demo_mode else ""
 
-        for team in ALL_TEAMS:
-            check_col, label_col, input_col = st.columns([0.4, 0.9, 1.2])
+            for team in ALL_TEAMS:
+                check_col, label_col, input_col = st.columns([0.4, 0.9, 1.2])
 
-            # Get default values based on demo mode
-            if st.session_state.demo_mode:
-                default_enabled = (team <= 13)
-                default_census = str(DEMO_CENSUS.get(team, 0)) if DEMO_CENSUS.get(team, 0) > 0 else ""
-            else:
-                default_enabled = (team <= 13)
-                default_census = ""
-
-            with check_col:
-                # Checkbox = accept redis (not team existence)
-                accept_redis = st.checkbox(
-                    f"Accept redis Med {team}",
-                    value=default_enabled,
-                    key=f"nights_enable_{team}{key_suffix}",
+                # Get default values based on demo mode
+                if st.session_state.demo_mode:
+                    default_enabled = (team <= 13)
+                    default_census = str(DEMO_CENSUS.get(team, 0)) if DEMO_CENSUS.get(team, 0) > 0 else ""
+                else:
+                    default_enabled = (team <= 13)
+                    default_census = ""
+
+                with check_col:
+                    # Checkbox = accept redis (not team existence)
+                    accept_redis = st.checkbox(
+                        f"Accept redis Med {team}",
+                        value=default_enabled,
+                        key=f"nights_enable_{team}{key_suffix}",
+                        label_visibility="collapsed"
+                    )
+                with label_col:
+                    imcu = "*" if team in IMCU_TEAMS else ""
+                    st.markdown(f"<div style='padding-top:8px'>Med {team}{imcu}</div>", unsafe_allow_html=True)
+                with input_col:
+                    # Always show census input
+                    value = st.text_input(
+                        f"Med {team}",
+                        value=default_census,
+                        key=f"nights_census_{team}{key_suffix}",
+                        label_visibility="collapsed"
+                    )
+                    if value:
+                        try:
+                            nights_census[team] = int(value)
+                        except ValueError:
+                            nights_census[team] = 0
+                    else:
+                        nights_census[team] = 0
+
+                # If not accepting redis, add to closed teams
+                if not accept_redis:
+                    nights_closed_teams.add(team)
+
+        # Columns 2-6: Overnight Doctors (Amion naming) + Other
+        doc_cols = [doc1_col, doc2_col, doc3_col, doc4_col, other_col]
+        doc_labels = [
+            ("Med Q", "1-3"),
+            ("Med S", "4-6"),
+            ("Med Y", "7-9"),
+            ("Med Z", "10-13"),
+            ("Other", ""),
+        ]
+        doctor_names = []
+        doctor_patients = []
+
+        for i, (doc_col, (code, teams)) in enumerate(zip(doc_cols, doc_labels), 1):
+            with doc_col:
+                if teams:
+                    st.subheader(f"{code} ({teams})")
+                else:
+                    st.subheader(code)
+
+                # Get demo values if in demo mode
+                if st.session_state.demo_mode:
+                    default_name = DEMO_DOCTORS[i-1]
+                    default_patients = DEMO_PATIENTS[i-1]
+                else:
+                    default_name = ""
+                    default_patients = ""
+
+                name = st.text_input(
+                    "Name",
+                    value=default_name,
+                    key=f"nights_doc_{i}{key_suffix}",
+                    placeholder="Name",
                     label_visibility="collapsed"
                 )
-            with label_col:
-                imcu = "*" if team in IMCU_TEAMS else ""
-                st.markdown(f"<div style='padding-top:8px'>Med {team}{imcu}</div>", unsafe_allow_html=True)
-            with input_col:
-                # Always show census input
-                value = st.text_input(
-                    f"Med {team}",
-                    value=default_census,
-                    key=f"nights_census_{team}{key_suffix}",
+                doctor_names.append(name.strip() if name else code)
+
+                patients = st.text_area(
+                    "Patients",
+                    value=default_patients,
+                    key=f"nights_patients_{i}{key_suffix}",
+                    height=400,
+                    placeholder="310A\n545\n634* (append * for IMCU)\n..." if i == 1 else "312\n545\n7E\n...",
                     label_visibility="collapsed"
                 )
-                if value:
-                    try:
-                        nights_census[team] = int(value)
-                    except ValueError:
-                        nights_census[team] = 0
-                else:
-                    nights_census[team] = 0
-
-            # If not accepting redis, add to closed teams
-            if not accept_redis:
-                nights_closed_teams.add(team)
-
-    # Columns 2-6: Overnight Doctors (Amion naming) + Other
-    doc_cols = [doc1_col, doc2_col, doc3_col, doc4_col, other_col]
-    doc_labels = [
-        ("Med Q", "1-3"),
-        ("Med S", "4-6"),
-        ("Med Y", "7-9"),
-        ("Med Z", "10-13"),
-        ("Other", ""),
-    ]
-    doctor_names = []
-    doctor_patients = []
+                doctor_patients.append(patients)
 
-    for i, (doc_col, (code, teams)) in enumerate(zip(doc_cols, doc_labels), 1):
-        with doc_col:
-            if teams:
-                st.subheader(f"{code} ({teams})")
-            else:
-                st.subheader(code)
+        # Show closed teams
+        if nights_closed_teams:
+            st.info(f"**Not accepting redis:** {', '.join(f'Med {t}' for t in sorted(nights_closed_teams))}")
 
-            # Get demo values if in demo mode
+        # Button row: Optimize (4/5) + Demo/Clear (1/5)
+        btn_col1, btn_col2 = st.columns([4, 1])
+        with btn_col1:
+            optimize_clicked = st.form_submit_button("Optimize Placements", type="primary", use_container_width=True)
+        with btn_col2:
             if st.session_state.demo_mode:
-                default_name = DEMO_DOCTORS[i-1]
-                default_patients = DEMO_PATIENTS[i-1]
+                if st.form_submit_button("Clear", use_container_width=True):
+                    st.session_state.pop('nights_result', None)
+                    st.session_state.demo_mode = False
+                    st.rerun()
             else:
-                default_name = ""
-                default_patients = ""
-
-            name = st.text_input(
-                "Name",
-                value=default_name,
-                key=f"nights_doc_{i}{key_suffix}",
-                placeholder="Name",
-                label_visibility="collapsed"
-            )
-            doctor_names.append(name.strip() if name else code)
-
-            patients = st.text_area(
-                "Patients",
-                value=default_patients,
-                key=f"nights_patients_{i}{key_suffix}",
-                height=400,
-                placeholder="310A\n545\n634* (append * for IMCU)\n..." if i == 1 else "312\n545\n7E\n...",
-                label_visibility="collapsed"
-            )
-            doctor_patients.append(patients)
-
-    # Show closed teams
-    if nights_closed_teams:
-        st.info(f"**Not accepting redis:** {', '.join(f'Med {t}' for t in sorted(nights_closed_teams))}")
-
-    # Button row: Optimize (4/5) + Demo/Clear (1/5)
-    btn_col1, btn_col2 = st.columns([4, 1])
-    with btn_col1:
-        optimize_clicked = st.button("Optimize Placements", type="primary", use_container_width=True, key="nights_optimize")
-    with btn_col2:
-        if st.session_state.demo_mode:
-            if st.button("Clear", use_container_width=True, key="nights_clear"):
-                st.session_state.demo_mode = False
-                st.rerun()
-        else:
-            if st.button("Demo", use_container_width=True, key="nights_demo"):
-                st.session_state.demo_mode = True
-                st.rerun()
+                if st.form_submit_button("Demo", use_container_width=True):
+                    st.session_state.pop('nights_result', None)
+                    st.session_state.demo_mode = True
+                    st.rerun()
 
     if optimize_clicked:
         # Parse patients from all 4 doctor columns
@@ -853,171 +959,147 @@ with tab_nights:
 
         if not patients:
             st.warning("No patients entered. Please enter patient locations above.")
+            st.session_state.pop('nights_result', None)
         else:
-            assignments = optimize_placements(patients, nights_census, nights_closed_teams)
+            assignments, final_census = run_optimize_cached(
+                tuple((p.identifier, p.floor, p.raw_location, p.admitted_by) for p in patients),
+                tuple(sorted(nights_census.items())),
+                tuple(sorted(nights_closed_teams)),
+            )
+            # Keep the result, with the inputs it was computed from, so reruns
+            # from other widgets and tabs re-render it without re-parsing
+            st.session_state.nights_result = (
+                assignments, final_census, duplicates, dict(nights_census), frozenset(nights_closed_teams)
+            )
 
-            final_census = nights_census.copy()
-            for a in assignments:
-                final_census[a.team] = final_census.get(a.team, 0) + 1
+    nights_result = st.session_state.get('nights_result')
+    if nights_result is not None:
+        assignments, final_census, duplicates, nights_census, nights_closed_teams = nights_result
 
-            st.markdown("---")
-            st.markdown("<div id='results-section'></div>", unsafe_allow_html=True)
-            st.subheader("Results")
+        st.markdown("---")
+        st.markdown("<div id='results-section'></div>", unsafe_allow_html=True)
+        st.subheader("Results")
 
+        # Scroll only on the click that produced the result, not on later reruns
+        if optimize_clicked:
             components.html("""
                 <script>
                     window.parent.document.getElementById('results-section').scrollIntoView({behavior: 'smooth'});
                 </script>
             """, height=0)
 
-            if duplicates > 0:
-                st.warning(f"Skipped {duplicates} duplicate(s)")
+        if duplicates > 0:
+            st.warning(f"Skipped {duplicates} duplicate(s)")
 
-            geo_count = sum(1 for a in assignments if a.is_geographic)
-            total = len(assignments)
+        # One pass: group by team for the By Team and EPIC Message columns,
+        # and count geographic placements for the metrics
+        by_team = {}
+        geo_count = 0
+        for a in assignments:
+            by_team.setdefault(a.team, []).append(a)
+            geo_count += a.is_geographic
+        total = len(assignments)
 
-            metric_cols = st.columns(4)
-            metric_cols[0].metric("Total Patients", total)
-            metric_cols[1].metric("Geographic", f"{geo_count} ({100*geo_count//total if total else 0}%)")
-            metric_cols[2].metric("Non-Geographic", total - geo_count)
-            metric_cols[3].metric("Teams Used", len(set(a.team for a in assignments)))
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Total Patients", total)
+        metric_cols[1].metric("Geographic", f"{geo_count} ({100*geo_count//total if total else 0}%)")
+        metric_cols[2].metric("Non-Geographic", total - geo_count)
+        metric_cols[3].metric("Teams Used", len(by_team))
 
-            res_col1, res_col2, res_col3, res_col4 = st.columns(4)
+        res_col1, res_col2, res_col3, res_col4 = st.columns(4)
 
-            with res_col1:
-                st.markdown("### Census Summary")
-                summary_text = "Team   Start +New =Final\n"
-                summary_text += "-" * 26 + "\n"
+        with res_col1:
+            st.markdown("### Census Summary")
+            summary_lines = ["Team   Start +New =Final", "-" * 26]
 
-                for team in ALL_TEAMS:
-                    start = nights_census.get(team, 0)
-                    final = final_census.get(team, 0)
-                    new = final - start
+            for team in ALL_TEAMS:
+                start = nights_census.get(team, 0)
+                final = final_census[team]
+                new = final - start
 
-                    imcu = "*" if team in IMCU_TEAMS else " "
+                imcu = "*" if team in IMCU_TEAMS else " "
 
-                    # Census 0 = service closed
-                    if start == 0 and team in nights_closed_teams:
-                        summary_text += f"Med {team:2d}{imcu}  --  CLOSED\n"
-                        continue
+                # Census 0 = service closed
+                if start == 0 and team in nights_closed_teams:
+                    summary_lines.append(f"Med {team:2d}{imcu}  --  CLOSED")
+                    continue
 
-                    # Has census but not accepting redis
-                    if team in nights_closed_teams:
-                        summary_text += f"Med {team:2d}{imcu} {start:2d}   -   ={start:2d} (no redis)\n"
-                        continue
+                # Has census but not accepting redis
+                if team in nights_closed_teams:
+                    summary_lines.append(f"Med {team:2d}{imcu} {start:2d}   -   ={start:2d} (no redis)")
+                    continue
 
-                    warning = ""
-                    if team in IMCU_TEAMS and final >= IMCU_CAP:
-                        warning = " CAP"
-                    elif team not in IMCU_TEAMS and final >= SOFT_CAP:
-                        warning = " HIGH"
-
-                    summary_text += f"Med {team:2d}{imcu} {start:2d}  +{new:2d}  ={final:2d}{warning}\n"
-
-                summary_text += "\n* = IMCU (cap: 10)"
-                st.code(summary_text, language=None)
-
-            with res_col2:
-                st.markdown("### Assignment List")
-                sorted_assignments = sorted(assignments, key=lambda a: a.patient.raw_location)
-                assignment_text = ""
-                for a in sorted_assignments:
-                    assignment_text += f"{a.patient.raw_location:8} → Med {a.team:2d} ({a.patient.admitted_by})\n"
-                st.code(assignment_text, language=None)
-
-            with res_col3:
-                st.markdown("### By Team")
-                by_team = defaultdict(list)
-                for a in assignments:
-                    by_team[a.team].append(a)
-
-                by_team_text = ""
-                for team in ALL_TEAMS:
-                    team_assignments = by_team[team]
-                    start = nights_census.get(team, 0)
-                    final = final_census.get(team, 0)
-                    imcu = "*" if team in IMCU_TEAMS else ""
+                warning = ""
+                if team in IMCU_TEAMS and final >= IMCU_CAP:
+                    warning = " CAP"
+                elif team not in IMCU_TEAMS and final >= SOFT_CAP:
+                    warning = " HIGH"
 
-                    if team in nights_closed_teams:
-                        # Census 0 = closed, skip entirely
-                        if start == 0:
-                            continue
-                        # Has census but not accepting redis
-                        by_team_text += f"Med {team}{imcu} ({start}, no redis)\n\n"
-                        continue
+                summary_lines.append(f"Med {team:2d}{imcu} {start:2d}  +{new:2d}  ={final:2d}{warning}")
+
+            summary_lines.append("\n* = IMCU (cap: 10)")
+            st.code("\n".join(summary_lines), language=None)
+
+        with res_col2:
+            st.markdown("### Assignment List")
+            sorted_assignments = sorted(assignments, key=attrgetter('patient.raw_location'))
+            assignment_text = "".join(
+                f"{a.patient.raw_location:8} → Med {a.team:2d} ({a.patient.admitted_by})\n"
+                for a in sorted_assignments
+            )
+            st.code(assignment_text, language=None)
+
+        with res_col3:
+            st.markdown("### By Team")
+            by_team_parts = []
+            for team in ALL_TEAMS:
+                team_assignments = by_team.get(team, ())
+                start = nights_census.get(team, 0)
+                final = final_census[team]
+                imcu = "*" if team in IMCU_TEAMS else ""
 
-                    if not team_assignments:
+                if team in nights_closed_teams:
+                    # Census 0 = closed, skip entirely
+                    if start == 0:
                         continue
+                    # Has census but not accepting redis
+                    by_team_parts.append(f"Med {team}{imcu} ({start}, no redis)\n\n")
+                    continue
 
-                    by_team_text += f"Med {team}{imcu} ({start}→{final})\n"
-
-                    for a in team_assignments:
-                        by_team_text += f"  {a.patient.raw_location} ({a.patient.admitted_by})\n"
-                    by_team_text += "\n"
-
-                st.code(by_team_text, language=None)
-
-            with res_col4:
-                st.markdown("### EPIC Message")
-                by_team = defaultdict(list)
-                for a in assignments:
-                    by_team[a.team].append((a.patient.raw_location, a.patient.admitted_by))
-
-                epic_lines = ["Good Morning! Here are today's redis:"]
-                # Show all teams except closed ones (closed = not accepting AND zero census)
-                truly_closed = set(t for t in nights_closed_teams if nights_census.get(t, 0) == 0)
-                teams_to_show = [t for t in ALL_TEAMS if t not in truly_closed]
-                for team in teams_to_show:
-                    if team in by_team:
-                        patient_strs = [f"{room} ({doc})" for room, doc in by_team[team]]
-                        epic_lines.append(f"Med {team}: {', '.join(patient_strs)}")
-                    elif team in nights_closed_teams:
-                        epic_lines.append(f"Med {team}: no redis (not accepting)")
-                    else:
-                        epic_lines.append(f"Med {team}: no redis")
-
-                epic_message = "\n".join(epic_lines)
-                line_count = len(epic_lines)
-                text_height = max(150, line_count * 22 + 50)
-
-                components.html(f"""
-                    <style>
-                        .epic-container {{
-                            font-family: monospace;
-                            background-color: #f0f2f6;
-                            border-radius: 5px;
-                            padding: 10px;
-                            white-space: pre-wrap;
-                            font-size: 14px;
-                            line-height: 1.4;
-                        }}
-                        .copy-btn {{
-                            background-color: #9D2235;
-                            color: white;
-                            border: none;
-                            padding: 8px 16px;
-                            border-radius: 5px;
-                            cursor: pointer;
-                            margin-bottom: 10px;
-                            font-weight: bold;
-                        }}
-                        .copy-btn:hover {{
-                            background-color: #7A1A2A;
-                        }}
-                    </style>
-                    <button class="copy-btn" onclick="copyToClipboard()">Copy Message</button>
-                    <div class="epic-container" id="epicMsg">{epic_message}</div>
-                    <script>
-                        function copyToClipboard() {{
-                            const text = document.getElementById('epicMsg').innerText;
-                            navigator.clipboard.writeText(text).then(() => {{
-                                const btn = document.querySelector('.copy-btn');
-                                btn.innerText = 'Copied!';
-                                setTimeout(() => {{ btn.innerText = 'Copy Message'; }}, 2000);
-                            }});
-                        }}
-                    </script>
-                """, height=text_height + 60)
+                if not team_assignments:
+                    continue
+
+                by_team_parts.append(f"Med {team}{imcu} ({start}→{final})\n")
+
+                for a in team_assignments:
+                    by_team_parts.append(f"  {a.patient.raw_location} ({a.patient.admitted_by})\n")
+                by_team_parts.append("\n")
+
+            st.code("".join(by_team_parts), language=None)
+
+        with res_col4:
+            st.markdown("### EPIC Message")
+            epic_lines = ["Good Morning! Here are today's redis:"]
+            # Show all teams except closed ones (closed = not accepting AND zero census)
+            truly_closed = set(t for t in nights_closed_teams if nights_census.get(t, 0) == 0)
+            teams_to_show = [t for t in ALL_TEAMS if t not in truly_closed]
+            for team in teams_to_show:
+                if team in by_team:
+                    patient_strs = [f"{a.patient.raw_location} ({a.patient.admitted_by})" for a in by_team[team]]
+                    epic_lines.append(f"Med {team}: {', '.join(patient_strs)}")
+                elif team in nights_closed_teams:
+                    epic_lines.append(f"Med {team}: no redis (not accepting)")
+                else:
+                    epic_lines.append(f"Med {team}: no redis")
+
+            epic_message = "\n".join(epic_lines)
+            line_count = len(epic_lines)
+            text_height = max(150, line_count * 22 + 50)
+
+            components.html(
+                _EPIC_MESSAGE_HTML.format(epic_message=epic_message),
+                height=text_height + 60
+            )
 
 
 # =============================================================================
@@ -1080,50 +1162,41 @@ with tab_shuffle:
                 for uploaded_file in uploaded_files:
                     with st.spinner(f"Processing {uploaded_file.name}..."):
                         try:
-                            image = Image.open(uploaded_file)
-
-                            # Try EXIF transpose first (handles phone photo orientation)
-                            try:
-                                image = ImageOps.exif_transpose(image)
-                            except Exception:
-                                pass
-
                             # Use rotation-aware OCR that tries all orientations
-                            best_pairs, best_text, best_rotation, best_psm = try_all_rotations(image)
+                            best_pairs, best_text, best_rotation, best_psm = ocr_screenshot(uploaded_file.getvalue())
                         except Exception as e:
                             st.error(f"Error processing {uploaded_file.name}: {e}")
                             best_pairs, best_text, best_rotation, best_psm = [], "", 0, 6
 
                     with st.expander(f"Raw OCR from {uploaded_file.name}"):
                         st.code(best_text)
-                        rooms_found = re.findall(r'\b(\d{3,4}[A-Z]?)\b', best_text, re.IGNORECASE)
-                        teams_found = re.findall(r'Med\s*(\d{1,2})', best_text, re.IGNORECASE)
+                        rooms_found = _OCR_ROOM_RE.findall(best_text)
+                        teams_found = _OCR_TEAM_RE.findall(best_text)
                         rotation_info = f", rotated {best_rotation}°" if best_rotation != 0 else ""
                         st.caption(f"Debug: {len(rooms_found)} rooms, {len(teams_found)} teams (PSM {best_psm}{rotation_info})")
 
                     all_pairs.extend(best_pairs)
                     st.info(f"Found {len(best_pairs)} room-team pairs in {uploaded_file.name}")
 
-                seen_rooms = set()
-                st.session_state.shuffle_patients = []
+                # First team read for each room wins; dict keeps upload order
+                team_by_room = {}
                 for room, team in all_pairs:
                     room = fix_ocr_room(room)
-                    if room is None:
-                        continue
-                    if room not in seen_rooms:
-                        seen_rooms.add(room)
-                        floor = normalize_floor(room)
-                        st.session_state.shuffle_patients.append(
-                            ExistingPatient(room=room, current_team=team, floor=floor)
-                        )
+                    if room is not None:
+                        team_by_room.setdefault(room, team)
+                st.session_state.shuffle_patients = [
+                    ExistingPatient(room=room, current_team=team, floor=normalize_floor(room))
+                    for room, team in team_by_room.items()
+                ]
 
                 if st.session_state.shuffle_patients:
                     st.success(f"Total: {len(st.session_state.shuffle_patients)} unique patients extracted")
 
                     with st.expander("Extracted data (verify this is correct)"):
-                        extracted_text = ""
-                        for p in sorted(st.session_state.shuffle_patients, key=lambda x: x.room):
-                            extracted_text += f"{p.room} Med {p.current_team}\n"
+                        extracted_text = "".join(
+                            f"{p.room} Med {p.current_team}\n"
+                            for p in sorted(st.session_state.shuffle_patients, key=attrgetter('room'))
+                        )
                         st.code(extracted_text)
                 else:
                     st.warning("No room-team pairs found. Check the raw OCR output above.")
@@ -1155,14 +1228,14 @@ with tab_shuffle:
                     if not line:
                         continue
 
-                    room_match = re.search(r'\b(\d{3}[A-Z]?)\b', line, re.IGNORECASE)
+                    room_match = _PASTE_ROOM_RE.search(line)
                     if not room_match:
                         parse_errors.append(f"No room found: {line}")
                         continue
 
                     room = room_match.group(1).upper()
 
-                    team_match = re.search(r'(?:Med\s*)?(\d{1,2})\b', line[room_match.end():], re.IGNORECASE)
+                    team_match = _PASTE_TEAM_RE.search(line, room_match.end())
                     if not team_match:
                         parse_errors.append(f"No team found: {line}")
                         continue
@@ -1192,7 +1265,8 @@ with tab_shuffle:
     # Process results if we have patients
     if st.session_state.shuffle_patients:
         all_patients = st.session_state.shuffle_patients
-        wrong_team, ok_team = analyze_patients(all_patients, shuffle_closed_teams)
+        # Sort by room once; both partitions keep that order for every view below
+        wrong_team, ok_team = analyze_patients(sorted(all_patients, key=attrgetter('room')), shuffle_closed_teams)
 
         st.markdown("---")
 
@@ -1214,35 +1288,26 @@ with tab_shuffle:
         for patient in all_patients:
             team_census[patient.current_team] += 1
 
-        SHUFFLE_IMCU_TARGET = 9
-        OVERFLOW_THRESHOLD = 10
-
         projected_census = dict(team_census)
         recommendations = []
 
-        available_overflow = [t for t in OVERFLOW_TEAMS if t not in shuffle_closed_teams]
+        available_overflow = [t for t in ALL_TEAMS if t in OVERFLOW_TEAMS and t not in shuffle_closed_teams]
 
-        for patient, acceptable in sorted(wrong_team, key=lambda x: x[0].room):
+        for patient, acceptable in wrong_team:
             if acceptable:
-                def team_score(t):
-                    census = projected_census.get(t, 0)
-                    if t in IMCU_TEAMS and census >= SHUFFLE_IMCU_TARGET:
-                        return census + 100
-                    return census
-
                 min_geo_census = min(projected_census.get(t, 0) for t in acceptable)
                 if min_geo_census >= OVERFLOW_THRESHOLD and available_overflow:
                     options = acceptable + available_overflow
                 else:
                     options = acceptable
 
-                best_team = min(options, key=team_score)
+                best_team = _pick_shuffle_team(options, projected_census)
                 projected_census[best_team] = projected_census.get(best_team, 0) + 1
                 projected_census[patient.current_team] = projected_census.get(patient.current_team, 0) - 1
                 recommendations.append((patient, best_team))
             else:
                 if available_overflow:
-                    best_team = min(available_overflow, key=lambda t: projected_census.get(t, 0))
+                    best_team = _lowest_count(available_overflow, projected_census)
                     projected_census[best_team] = projected_census.get(best_team, 0) + 1
                     projected_census[patient.current_team] = projected_census.get(patient.current_team, 0) - 1
                     recommendations.append((patient, best_team))
@@ -1253,47 +1318,44 @@ with tab_shuffle:
 
         with res_col1:
             st.markdown("### Census")
-            census_text = "Team  Now  +/-  =New\n"
-            census_text += "-" * 22 + "\n"
+            census_parts = ["Team  Now  +/-  =New\n", "-" * 22 + "\n"]
             for team in ALL_TEAMS:
                 if team in shuffle_closed_teams:
-                    census_text += f"Med {team:2d}   CLOSED\n"
+                    census_parts.append(f"Med {team:2d}   CLOSED\n")
                 else:
                     current = team_census.get(team, 0)
                     projected = projected_census.get(team, 0)
                     change = projected - current
                     imcu = "*" if team in IMCU_TEAMS else " "
                     if change > 0:
-                        census_text += f"Med {team:2d}{imcu} {current:2d}  +{change:2d}  ={projected:2d}\n"
+                        census_parts.append(f"Med {team:2d}{imcu} {current:2d}  +{change:2d}  ={projected:2d}\n")
                     elif change < 0:
-                        census_text += f"Med {team:2d}{imcu} {current:2d}  {change:3d}  ={projected:2d}\n"
+                        census_parts.append(f"Med {team:2d}{imcu} {current:2d}  {change:3d}  ={projected:2d}\n")
                     else:
-                        census_text += f"Med {team:2d}{imcu} {current:2d}    0  ={projected:2d}\n"
-            census_text += "\n* = IMCU"
-            st.code(census_text, language=None)
+                        census_parts.append(f"Med {team:2d}{imcu} {current:2d}    0  ={projected:2d}\n")
+            census_parts.append("\n* = IMCU")
+            st.code("".join(census_parts), language=None)
 
         with res_col2:
             st.markdown("### Needs Reassignment")
             if recommendations:
-                wrong_text = ""
+                wrong_parts = []
                 for patient, rec_team in recommendations:
                     room_padded = f"{patient.room:5}"
                     current_padded = f"Med {patient.current_team:2d}"
                     if rec_team:
                         new_padded = f"Med {rec_team:2d}"
-                        wrong_text += f"{room_padded} {current_padded} -> {new_padded}\n"
+                        wrong_parts.append(f"{room_padded} {current_padded} -> {new_padded}\n")
                     else:
-                        wrong_text += f"{room_padded} {current_padded} -> ?\n"
-                st.code(wrong_text, language=None)
+                        wrong_parts.append(f"{room_padded} {current_padded} -> ?\n")
+                st.code("".join(wrong_parts), language=None)
             else:
                 st.info("All patients on correct teams!")
 
         with res_col3:
             st.markdown("### Team Correct")
             if ok_team:
-                ok_text = ""
-                for patient in sorted(ok_team, key=lambda x: x.room):
-                    ok_text += f"{patient.room:5} Med {patient.current_team:2d}\n"
+                ok_text = "".join(f"{patient.room:5} Med {patient.current_team:2d}\n" for patient in ok_team)
                 st.code(ok_text, language=None)
             else:
                 st.info("None yet")
@@ -1327,19 +1389,17 @@ with tab_shuffle:
                     floors = TEAM_FLOORS_STR.get(team, "")
                     proj = projected_census.get(team, 0)
 
-                    roster_text = f"Med {team}{imcu} ({proj})\n"
-                    roster_text += f"{floors}\n"
-                    roster_text += "-" * 14 + "\n"
+                    roster_parts = [f"Med {team}{imcu} ({proj})\n", f"{floors}\n", "-" * 14 + "\n"]
 
                     if roster or old_count > 0:
                         for room, status in sorted(roster):
                             marker = ">" if status == "new" else " "
-                            roster_text += f"{marker} {room}\n"
-                        roster_text += f"\n-{old_count} old, +{new_count} new"
+                            roster_parts.append(f"{marker} {room}\n")
+                        roster_parts.append(f"\n-{old_count} old, +{new_count} new")
                     else:
-                        roster_text += "(no changes)"
+                        roster_parts.append("(no changes)")
 
-                    st.code(roster_text, language=None)
+                    st.code("".join(roster_parts), language=None)
 
 # =============================================================================
 # TAB 3: ANC SHEET (Password Protected)
@@ -1451,15 +1511,20 @@ def teaching_floor_match(team: str, floor: Optional[str], teaching_floors: dict[
     return bool(candidates & teaching_floors.get(team, set()))
 
 
+# Team label patterns for normalize_team_key, compiled once
+_TEAM_LETTER_RE = re.compile(r'^[A-J]\\b')
+_TEAM_MED_RE = re.compile(r'MED\\s*(\\d{1,2})')
+
+
 def normalize_team_key(text: str) -> Optional[str]:
     if not text:
         return None
     t = text.strip().upper()
-    if re.match(r'^[A-J]\\b', t):
+    if _TEAM_LETTER_RE.match(t):
         return t[0]
     if 'MED T' in t or 'T[BAT]' in t or 'BAT' in t:
         return 'T'
-    m = re.search(r'MED\\s*(\\d{1,2})', t)
+    m = _TEAM_MED_RE.search(t)
     if m:
         return m.group(1)
     return None
@@ -2181,9 +2246,9 @@ with tab_board:
                     if floor and candidates:
                         match_candidates = [t for t in candidates if teaching_floor_match(t, floor, teaching_floors)]
                         if match_candidates:
-                            chosen = min(match_candidates, key=lambda t: score_totals.get(t, 0))
+                            chosen = _lowest_count(match_candidates, score_totals)
                     if not chosen and candidates:
-                        chosen = min(candidates, key=lambda t: score_totals.get(t, 0))
+                        chosen = _lowest_count(candidates, score_totals)
 
                     if chosen:
                         assigned_team = chosen
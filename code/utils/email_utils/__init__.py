@@ -1,2 +1,2 @@
 # Email utilities package
-from .email_sender import send_email, send_via_outlook, send_via_smtp, load_config, save_password
+from .email_sender import send_email, send_email_broadcast, send_via_outlook, send_via_smtp, load_config, save_password
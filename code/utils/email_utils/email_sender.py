@@ -7,21 +7,52 @@ Supports Microsoft 365 via Outlook app or SMTP.
 
 import os
 import json
+import base64
 import subprocess
 import smtplib
 import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from email.message import EmailMessage
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import keyring
 
+try:
+    from Foundation import NSAppleScript, NSAppleEventDescriptor
+    APPLESCRIPT_AVAILABLE = True
+except ImportError:
+    APPLESCRIPT_AVAILABLE = False
+
 # Service name for keyring (secure credential storage)
 KEYRING_SERVICE = "temple_email_sender"
 
+
+# Outlook send handler, compiled once per process and called with
+# arguments so each send skips the osascript fork and script parse
+OUTLOOK_SEND_SCRIPT = '''
+on sendmail(theSubject, theBody, toList, ccList, bccList, attachmentList)
+    tell application "Microsoft Outlook"
+        set newMessage to make new outgoing message with properties {subject:theSubject, plain text content:theBody}
+        repeat with addr in toList
+            make new to recipient at newMessage with properties {email address:{address:(addr as text)}}
+        end repeat
+        repeat with addr in ccList
+            make new cc recipient at newMessage with properties {email address:{address:(addr as text)}}
+        end repeat
+        repeat with addr in bccList
+            make new bcc recipient at newMessage with properties {email address:{address:(addr as text)}}
+        end repeat
+        repeat with attPath in attachmentList
+            set attFile to POSIX file (attPath as text)
+            make new attachment at newMessage with properties {file:attFile}
+        end repeat
+        send newMessage
+    end tell
+end sendmail
+'''
+_outlook_script = None
+
 def get_config_path() -> Path:
     """Get path to config file."""
     return Path(__file__).parent / "config.json"
@@ -46,15 +77,89 @@ def get_password(email: str) -> Optional[str]:
     """Retrieve email password from macOS Keychain."""
     return keyring.get_password(KEYRING_SERVICE, email)
 
+def _encode_attachment(file_path: str) -> str:
+    """Read and base64-encode an attachment, reusing the cached payload if unchanged."""
+    stat = os.stat(file_path)
+    return _encode_attachment_version(file_path, stat.st_mtime, stat.st_size)
+
+@lru_cache(maxsize=8)
+def _encode_attachment_version(file_path: str, mtime: float, size: int) -> str:
+    """Base64 payload for one (path, mtime, size) version of a file. Bounded so a
+    long-running scheduler only keeps the last few attachments in memory."""
+    with open(file_path, 'rb') as f:
+        return base64.encodebytes(f.read()).decode('ascii')
+
+def _fourcc(code: str) -> int:
+    """Convert a four-character Apple Event code to its integer value."""
+    return int.from_bytes(code.encode('ascii'), 'big')
+
+def _string_list_descriptor(items: list[str]):
+    """Build an AppleScript list descriptor from Python strings."""
+    descriptor = NSAppleEventDescriptor.listDescriptor()
+    for i, item in enumerate(items, 1):
+        descriptor.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(item), i)
+    return descriptor
+
+def _send_via_outlook_compiled(
+    to: list[str],
+    subject: str,
+    body: str,
+    attachments: list[str],
+    cc: list[str],
+    bcc: list[str]
+) -> bool:
+    """Send email by calling the precompiled Outlook handler in-process."""
+    global _outlook_script
+    if _outlook_script is None:
+        script = NSAppleScript.alloc().initWithSource_(OUTLOOK_SEND_SCRIPT)
+        ok, error = script.compileAndReturnError_(None)
+        if not ok:
+            print(f"Outlook error: could not compile AppleScript: {error}")
+            return False
+        _outlook_script = script
+
+    # Subroutine call event: 'ascr'/'psbr' with the handler name and positional args
+    event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+        _fourcc('ascr'), _fourcc('psbr'), NSAppleEventDescriptor.nullDescriptor(), -1, 0
+    )
+    event.setParamDescriptor_forKeyword_(
+        NSAppleEventDescriptor.descriptorWithString_('sendmail'), _fourcc('snam')
+    )
+    params = NSAppleEventDescriptor.listDescriptor()
+    params.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(subject), 1)
+    params.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(body), 2)
+    params.insertDescriptor_atIndex_(_string_list_descriptor(to), 3)
+    params.insertDescriptor_atIndex_(_string_list_descriptor(cc), 4)
+    params.insertDescriptor_atIndex_(_string_list_descriptor(bcc), 5)
+    params.insertDescriptor_atIndex_(_string_list_descriptor(attachments), 6)
+    event.setParamDescriptor_forKeyword_(params, _fourcc('----'))
+
+    result, error = _outlook_script.executeAppleEvent_error_(event, None)
+    if result is None:
+        print(f"Outlook error: {error}")
+        return False
+    print(f"Email sent successfully via Outlook to {', '.join(to)}")
+    return True
+
 def send_via_outlook(
     to: list[str],
     subject: str,
     body: str,
     attachments: list[str] = None,
-    cc: list[str] = None
+    cc: list[str] = None,
+    bcc: list[str] = None
 ) -> bool:
     """Send email using Microsoft Outlook via AppleScript."""
 
+    if APPLESCRIPT_AVAILABLE:
+        abs_paths = [os.path.abspath(att_path) for att_path in attachments or []]
+        try:
+            return _send_via_outlook_compiled(to, subject, body, abs_paths, cc or [], bcc or [])
+        except Exception as e:
+            print(f"Error sending via Outlook: {e}")
+            return False
+
+    # Fallback without PyObjC: run the script through osascript
     # Escape special characters for AppleScript
     subject_escaped = subject.replace('\\', '\\\\').replace('"', '\\"')
     body_escaped = body.replace('\\', '\\\\').replace('"', '\\"')
@@ -69,6 +174,11 @@ def send_via_outlook(
         for addr in cc:
             recipient_commands += f'make new cc recipient at newMessage with properties {{email address:{{address:"{addr}"}}}}\n'
 
+    # Build BCC commands
+    if bcc:
+        for addr in bcc:
+            recipient_commands += f'make new bcc recipient at newMessage with properties {{email address:{{address:"{addr}"}}}}\n'
+
     # Build attachment commands
     attachment_commands = ""
     if attachments:
@@ -112,14 +222,22 @@ def send_via_smtp(
     body: str,
     attachments: list[str] = None,
     cc: list[str] = None,
+    bcc: list[str] = None,
     sender_email: str = None,
     sender_name: str = None,
     smtp_server: str = "smtp.office365.com",
-    smtp_port: int = 587
+    smtp_port: int = 587,
+    config: dict = None
 ) -> bool:
-    """Send email using SMTP (Microsoft 365)."""
+    """
+    Send email using SMTP (Microsoft 365).
+
+    BCC addresses are only added to the SMTP envelope (RCPT TO), never
+    to the message headers.
+    """
 
-    config = load_config()
+    if config is None:
+        config = load_config()
     email_config = config.get('email', {})
 
     sender_email = sender_email or email_config.get('sender_email')
@@ -139,7 +257,7 @@ def send_via_smtp(
         return False
 
     # Create message
-    msg = MIMEMultipart()
+    msg = EmailMessage()
     msg['From'] = f"{sender_name} <{sender_email}>" if sender_name else sender_email
     msg['To'] = ', '.join(to)
     if cc:
@@ -147,21 +265,25 @@ def send_via_smtp(
     msg['Subject'] = subject
 
     # Add body
-    msg.attach(MIMEText(body, 'plain'))
+    msg.set_content(body)
 
     # Add attachments
     if attachments:
         for file_path in attachments:
-            if os.path.exists(file_path):
-                with open(file_path, 'rb') as f:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(f.read())
-                encoders.encode_base64(part)
-                filename = os.path.basename(file_path)
-                part.add_header('Content-Disposition', f'attachment; filename="{filename}"')
-                msg.attach(part)
-            else:
+            try:
+                payload = _encode_attachment(file_path)
+            except FileNotFoundError:
                 print(f"Warning: Attachment not found: {file_path}")
+                continue
+            if msg.get_content_maintype() != 'multipart':
+                msg.make_mixed()
+            part = EmailMessage()
+            part['Content-Type'] = 'application/octet-stream'
+            part['Content-Transfer-Encoding'] = 'base64'
+            filename = os.path.basename(file_path)
+            part['Content-Disposition'] = f'attachment; filename="{filename}"'
+            part.set_payload(payload)
+            msg.attach(part)
 
     # Send email
     try:
@@ -169,8 +291,8 @@ def send_via_smtp(
         with smtplib.SMTP(smtp_server, smtp_port) as server:
             server.starttls(context=context)
             server.login(sender_email, password)
-            all_recipients = to + (cc or [])
-            server.sendmail(sender_email, all_recipients, msg.as_string())
+            all_recipients = to + (cc or []) + (bcc or [])
+            server.send_message(msg, from_addr=sender_email, to_addrs=all_recipients)
         print(f"Email sent successfully via SMTP to {', '.join(to)}")
         return True
     except smtplib.SMTPAuthenticationError:
@@ -187,7 +309,9 @@ def send_email(
     body: str,
     attachments: list[str] = None,
     cc: list[str] = None,
-    method: str = None
+    method: str = None,
+    config: dict = None,
+    bcc: list[str] = None
 ) -> bool:
     """
     Send an email using the configured method.
@@ -199,21 +323,72 @@ def send_email(
         attachments: List of file paths to attach
         cc: List of CC email addresses
         method: 'outlook' or 'smtp' (defaults to config setting)
+        config: Already-loaded config (skips reading config.json again)
+        bcc: List of BCC email addresses (hidden from other recipients)
 
     Returns:
         True if email sent successfully, False otherwise
     """
-    config = load_config()
-    method = method or config.get('email', {}).get('method', 'outlook')
+    if not method:
+        if config is None:
+            config = load_config()
+        method = config.get('email', {}).get('method', 'outlook')
 
     if method == 'outlook':
-        return send_via_outlook(to, subject, body, attachments, cc)
+        return send_via_outlook(to, subject, body, attachments, cc, bcc)
     elif method == 'smtp':
-        return send_via_smtp(to, subject, body, attachments, cc)
+        return send_via_smtp(to, subject, body, attachments, cc, bcc, config=config)
     else:
         print(f"Unknown email method: {method}")
         return False
 
+def send_email_broadcast(
+    recipients: list[str],
+    subject: str,
+    body: str,
+    attachments: list[str] = None,
+    method: str = None,
+    config: dict = None
+) -> bool:
+    """
+    Send one identical email to many recipients as a single message.
+
+    Use this instead of calling send_email once per recipient when the
+    subject, body and attachments are the same for everyone: the message
+    is built and transmitted once (one MAIL FROM, N RCPT TO, one DATA).
+
+    Recipients are sent as BCC so they don't see each other's addresses;
+    the To header is the sender. To show everyone on the To line instead,
+    call send_email with the full list.
+
+    Args:
+        recipients: List of recipient email addresses
+        subject: Email subject
+        body: Email body text
+        attachments: List of file paths to attach
+        method: 'outlook' or 'smtp' (defaults to config setting)
+        config: Already-loaded config (skips reading config.json again)
+
+    Returns:
+        True if email sent successfully, False otherwise
+    """
+    if config is None:
+        config = load_config()
+    sender_email = config.get('email', {}).get('sender_email')
+    if not sender_email:
+        print("Error: sender_email not configured")
+        return False
+
+    return send_email(
+        to=[sender_email],
+        subject=subject,
+        body=body,
+        attachments=attachments,
+        method=method,
+        config=config,
+        bcc=recipients
+    )
+
 def format_template(template: str, **kwargs) -> str:
     """Format a template string with provided variables."""
     return template.format(**kwargs)
@@ -232,6 +407,7 @@ if __name__ == "__main__":
     send_parser.add_argument('--body', required=True, help='Email body')
     send_parser.add_argument('--attach', nargs='+', help='File(s) to attach')
     send_parser.add_argument('--cc', nargs='+', help='CC recipient(s)')
+    send_parser.add_argument('--bcc', nargs='+', help='BCC recipient(s)')
     send_parser.add_argument('--method', choices=['outlook', 'smtp'], help='Send method')
 
     # Save password command
@@ -252,7 +428,8 @@ if __name__ == "__main__":
             body=args.body,
             attachments=args.attach,
             cc=args.cc,
-            method=args.method
+            method=args.method,
+            bcc=args.bcc
         )
         exit(0 if success else 1)
 
@@ -20,6 +20,7 @@ def send_anc_sheet(
     date: datetime = None,
     recipients: list[str] = None,
     cc: list[str] = None,
+    bcc: list[str] = None,
     subject: str = None,
     body: str = None
 ) -> bool:
@@ -30,6 +31,7 @@ def send_anc_sheet(
         date: Date for ANC sheet (defaults to tomorrow)
         recipients: Override recipients from config
         cc: Override CC from config
+        bcc: Override BCC from config (an empty list sends no BCC)
         subject: Override subject template
         body: Override body template
 
@@ -55,6 +57,7 @@ def send_anc_sheet(
     # Get recipients
     recipients = recipients or job_config.get('recipients', [])
     cc = cc or job_config.get('cc', [])
+    bcc = job_config.get('bcc', []) if bcc is None else bcc
 
     if not recipients:
         print("Error: No recipients configured")
@@ -87,13 +90,17 @@ def send_anc_sheet(
     print(f"Sending to: {', '.join(recipients)}")
     if cc:
         print(f"CC: {', '.join(cc)}")
+    if bcc:
+        print(f"BCC: {', '.join(bcc)}")
 
     success = send_email(
         to=recipients,
         subject=subject,
         body=body,
         attachments=[output_path],
-        cc=cc
+        cc=cc,
+        config=config,
+        bcc=bcc
     )
 
     if success:
@@ -110,6 +117,7 @@ if __name__ == "__main__":
     parser.add_argument('--date', help='Date for ANC sheet (MM-DD-YYYY), defaults to tomorrow')
     parser.add_argument('--to', nargs='+', help='Override recipients')
     parser.add_argument('--cc', nargs='+', help='Override CC recipients')
+    parser.add_argument('--bcc', nargs='+', help='Override BCC recipients')
     parser.add_argument('--test', action='store_true', help='Send to yourself for testing')
 
     args = parser.parse_args()
@@ -125,11 +133,13 @@ if __name__ == "__main__":
 
     # For test mode, send to sender
     recipients = args.to
+    bcc = args.bcc
     if args.test:
         config = load_config()
         sender = config.get('email', {}).get('sender_email')
         if sender:
             recipients = [sender]
+            bcc = []  # No silent copies to the configured BCC list
             print(f"Test mode: sending to {sender}")
         else:
             print("Error: No sender_email configured for test mode")
@@ -138,7 +148,8 @@ if __name__ == "__main__":
     success = send_anc_sheet(
         date=target_date,
         recipients=recipients,
-        cc=args.cc
+        cc=args.cc,
+        bcc=bcc
     )
 
     exit(0 if success else 1)
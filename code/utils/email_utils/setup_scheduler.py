@@ -7,6 +7,7 @@ Configures launchd jobs for automated email sending on macOS.
 import os
 import json
 import shutil
+import plistlib
 import subprocess
 from pathlib import Path
 from datetime import datetime
@@ -15,6 +16,9 @@ PLIST_DIR = Path.home() / "Library" / "LaunchAgents"
 PROJECT_DIR = Path(__file__).parent.parent
 EMAIL_UTILS_DIR = Path(__file__).parent
 
+# launchd Weekday values (0 = Sunday)
+_DAY_MAP = {'Sun': 0, 'Mon': 1, 'Tue': 2, 'Wed': 3, 'Thu': 4, 'Fri': 5, 'Sat': 6}
+
 def create_launchd_plist(
     job_name: str,
     script_path: str,
@@ -29,25 +33,15 @@ def create_launchd_plist(
     plist_path = PLIST_DIR / f"{plist_name}.plist"
 
     # Build calendar interval (schedule)
-    calendar_interval = {
-        'Hour': schedule_hour,
-        'Minute': schedule_minute
-    }
+    calendar_value = {'Hour': schedule_hour, 'Minute': schedule_minute}
 
-    # If specific days, create multiple intervals
+    # If specific days, create one interval per day
     if schedule_days:
-        day_map = {'Sun': 0, 'Mon': 1, 'Tue': 2, 'Wed': 3, 'Thu': 4, 'Fri': 5, 'Sat': 6}
-        calendar_intervals = []
-        for day in schedule_days:
-            if day in day_map:
-                interval = calendar_interval.copy()
-                interval['Weekday'] = day_map[day]
-                calendar_intervals.append(interval)
-        calendar_key = 'StartCalendarInterval'
+        calendar_intervals = [
+            {'Hour': schedule_hour, 'Minute': schedule_minute, 'Weekday': _DAY_MAP[day]}
+            for day in schedule_days if day in _DAY_MAP
+        ]
         calendar_value = calendar_intervals if len(calendar_intervals) > 1 else calendar_intervals[0]
-    else:
-        calendar_key = 'StartCalendarInterval'
-        calendar_value = calendar_interval
 
     # Build program arguments
     program_args = ['/usr/bin/python3', script_path]
@@ -55,55 +49,16 @@ def create_launchd_plist(
         program_args.extend(args)
 
     # Create plist content
-    plist_content = f'''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
-<plist version="1.0">
-<dict>
-    <key>Label</key>
-    <string>{plist_name}</string>
-
-    <key>ProgramArguments</key>
-    <array>
-'''
-    for arg in program_args:
-        plist_content += f'        <string>{arg}</string>\n'
-
-    plist_content += f'''    </array>
-
-    <key>{calendar_key}</key>
-'''
-
-    if isinstance(calendar_value, list):
-        plist_content += '    <array>\n'
-        for interval in calendar_value:
-            plist_content += '        <dict>\n'
-            for key, value in interval.items():
-                plist_content += f'            <key>{key}</key>\n'
-                plist_content += f'            <integer>{value}</integer>\n'
-            plist_content += '        </dict>\n'
-        plist_content += '    </array>\n'
-    else:
-        plist_content += '    <dict>\n'
-        for key, value in calendar_value.items():
-            plist_content += f'        <key>{key}</key>\n'
-            plist_content += f'        <integer>{value}</integer>\n'
-        plist_content += '    </dict>\n'
-
-    plist_content += f'''
-    <key>WorkingDirectory</key>
-    <string>{PROJECT_DIR}</string>
-
-    <key>StandardOutPath</key>
-    <string>{PROJECT_DIR}/logs/{job_name}.log</string>
-
-    <key>StandardErrorPath</key>
-    <string>{PROJECT_DIR}/logs/{job_name}.error.log</string>
-
-    <key>RunAtLoad</key>
-    <false/>
-</dict>
-</plist>
-'''
+    plist = {
+        'Label': plist_name,
+        'ProgramArguments': program_args,
+        'StartCalendarInterval': calendar_value,
+        'WorkingDirectory': str(PROJECT_DIR),
+        'StandardOutPath': f"{PROJECT_DIR}/logs/{job_name}.log",
+        'StandardErrorPath': f"{PROJECT_DIR}/logs/{job_name}.error.log",
+        'RunAtLoad': False,
+    }
+    plist_content = plistlib.dumps(plist, sort_keys=False).decode('utf-8')
 
     return plist_path, plist_content
 